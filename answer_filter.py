@@ -0,0 +1,125 @@
+"""Local pre-filter for interview answers.
+
+Empty, trivial ("idk"), junk and echoed answers are recognised in microseconds and
+answered with canned coaching, so only substantive answers cost an analyze_answer
+call and a rate limiter slot. The checks are deliberately conservative: anything
+that might be a real answer goes to the model. A short answer can be complete
+("4" to "What's 2+2?"), so length alone never rejects one, and whether an answer
+is on topic is left to the model: keyword overlap cannot tell.
+"""
+import math
+import re
+from collections import Counter
+
+import metrics
+from text_utils import extract_keywords
+
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being between both but by
+can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or
+other our ours out over own same she should so some such than that the their them then there these they
+this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself
+""".split())
+
+# Whole answers that mean "no answer"
+TRIVIAL_ANSWERS = frozenset({
+    "idk", "i dont know", "i don't know", "dont know", "don't know", "no idea", "not sure", "pass", "skip",
+    "next", "na", "n/a", "nothing", "ok", "okay", "maybe", "?", "...", "-",
+})
+# Whole answers that are complete for a yes/no or "which of these" question, and no answer to an open one
+CLOSED_ANSWERS = frozenset({"yes", "no", "none"})
+CLOSED_QUESTION = re.compile(
+    r"^\W*(is|are|was|were|do|does|did|have|has|had|can|could|would|will|should)\b|\bwhich\b", re.I
+)
+
+# Answers with fewer content words than this are never taken for an echo of the question
+ECHO_MIN_WORDS = 3
+# Share of the answer's content words taken from the question above which it is an echo
+ECHO_OVERLAP = 0.8
+# Lowercase words without vowels at least this long count as keyboard mashing; shorter ones and
+# acronyms such as "HTML" or "gRPC" do not
+MASHING_MIN_LETTERS = 6
+# Letter entropy (bits) below which ENTROPY_MIN_LETTERS or more letters are a repeated key or pattern
+MIN_ENTROPY = 2.5
+ENTROPY_MIN_LETTERS = 10
+
+COACHING = {
+    "empty": "It looks like your answer was empty. Take a moment, then answer in a few sentences.",
+    "trivial": (
+        "It's fine not to know everything, but try to give it a go: say how you would approach the problem, "
+        "or describe a related experience. A structured answer (Situation, Task, Action, Result) is a good start."
+    ),
+    "gibberish": "I couldn't read that answer. Please answer the question in a few full sentences.",
+    "echo": (
+        "You've restated the question. Now answer it: give a concrete example from your experience "
+        "and explain what you did and why."
+    ),
+}
+
+
+def content_words(text):
+    """Lowercased words of text without stopwords."""
+    return [word for word in extract_keywords(text) if word not in STOPWORDS]
+
+
+def char_entropy(text):
+    """Shannon entropy in bits per character, ignoring whitespace."""
+    chars = [char for char in text.lower() if not char.isspace()]
+    if not chars:
+        return 0.0
+    total = len(chars)
+    return -sum(count / total * math.log2(count / total) for count in Counter(chars).values())
+
+
+def looks_like_junk(answer, words):
+    # Digits count: "4" or "O(n log n)" are answers, "%$#@!" is not
+    if sum(char.isalnum() for char in answer) < 0.5 * len(answer.strip()):
+        return True
+    letters = "".join(char for char in answer if char.isalpha())
+    if len(letters) >= ENTROPY_MIN_LETTERS and char_entropy(letters) < MIN_ENTROPY:
+        return True
+    # Keyboard mashing: mostly long lowercase words without vowels
+    vowelless = sum(
+        1 for word in re.findall(r"[^\W\d_]+", answer)
+        if len(word) >= MASHING_MIN_LETTERS and word.islower() and not set(word) & set("aeiouy")
+    )
+    if words and vowelless > len(words) / 2:
+        return True
+    # The same few words pasted over and over
+    return len(words) >= 10 and len(set(words)) < 0.3 * len(words)
+
+
+def classify_answer(answer, question=None):
+    """Returns "ok" for answers worth sending to the model, otherwise the reason they are not."""
+    normalized = " ".join(answer.lower().split()).strip(" .!")
+    if not normalized:
+        return "empty"
+    if normalized in CLOSED_ANSWERS:
+        return "ok" if question and CLOSED_QUESTION.search(question) else "trivial"
+    if normalized in TRIVIAL_ANSWERS:
+        return "trivial"
+
+    words = extract_keywords(answer)
+    if looks_like_junk(answer, words):
+        return "gibberish"
+    content = [word for word in words if word not in STOPWORDS]
+    if not content:
+        return "trivial"
+
+    if question and len(content) >= ECHO_MIN_WORDS:
+        question_words = set(content_words(question))
+        shared = sum(1 for word in content if word in question_words)
+        if shared >= ECHO_OVERLAP * len(content) and len(words) <= 2 * len(extract_keywords(question)):
+            return "echo"
+    return "ok"
+
+
+def canned_feedback(answer, question=None):
+    """Returns coaching for an answer the model does not need to see, or None for a substantive one."""
+    verdict = classify_answer(answer, question)
+    metrics.ANSWER_VERDICTS.labels(verdict).inc()
+    if verdict == "ok":
+        return None
+    return COACHING[verdict]
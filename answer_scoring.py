@@ -0,0 +1,248 @@
+"""Local answer scoring: an instant 0-100 score per answer, before any LLM feedback.
+
+The score is a weighted sum of answer features:
+    relevance      cosine similarity of the answer's and the question's term vectors
+    jd_coverage    job description skills (skills.py) the answer mentions, full at a handful
+    star           share of Situation / Task / Action / Result parts present
+    length         words, saturating at a full-length answer
+    specificity    numbers, percentages and units that make an answer concrete
+
+The app shows it as live progress. Weights can be calibrated against the model's
+final report scores of stored sessions:
+
+    python answer_scoring.py calibrate --db interview_sessions.db
+
+Setting LLM_REVIEW_MIN_SCORE makes the app skip the LLM evaluation for answers
+scoring below it (they get local feedback naming what is missing). It is off by
+default: the default weights are a guess, and an uncalibrated cut-off would send
+real answers local feedback. calibrate prints the lowest local score among
+sessions the model passed; a threshold safely below that one only skips answers
+the model would have failed too.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from answer_filter import STOPWORDS
+from skills import extract_skills, skill_set
+from text_utils import extract_keywords
+
+WEIGHTS_PATH = os.environ.get("ANSWER_SCORING_WEIGHTS", "answer_scoring_weights.json")
+
+# Answers scoring below this get local feedback instead of an LLM evaluation; 0 (the default) disables it
+LLM_REVIEW_MIN_SCORE = float(os.environ.get("LLM_REVIEW_MIN_SCORE", 0))
+# Report score from which the model counts an interview as passed, for suggesting LLM_REVIEW_MIN_SCORE
+PASSING_REPORT_SCORE = 60
+
+FEATURES = ("relevance", "jd_coverage", "star", "length", "specificity")
+DEFAULT_WEIGHTS = {
+    "intercept": 10.0,
+    "relevance": 40.0,
+    "jd_coverage": 30.0,
+    "star": 25.0,
+    "length": 10.0,
+    "specificity": 10.0,
+}
+
+# Number of job description terms an answer is checked against when no taxonomy skill is found
+JD_TERMS = 30
+# Job description skills an answer has to mention for full coverage
+JD_COVERAGE_TARGET = 5
+# Words at which an answer counts as full length
+FULL_LENGTH_WORDS = 120
+
+STAR_CUES = {
+    "situation": re.compile(
+        r"\b(when i was|at my (previous|last|current)|in my (last|previous|current) (role|job|position|team)|"
+        r"we had|our team|the situation|at the time|while working|last year|at \w+ we)\b"
+    ),
+    "task": re.compile(
+        r"\b(my (task|role|job|goal|responsibility) was|i was (responsible|asked|tasked)|the goal was|"
+        r"we needed to|i needed to|had to|objective)\b"
+    ),
+    "action": re.compile(
+        r"\bi (decided|implemented|led|built|designed|organi[sz]ed|wrote|created|introduced|set up|started|"
+        r"used|proposed|refactored|migrated|automated|analy[sz]ed|investigated|worked with|talked to)\b"
+    ),
+    "result": re.compile(
+        r"\b(as a result|resulted in|which (led|meant)|in the end|outcome|reduc\w+|increas\w+|improv\w+|"
+        r"cut\w*|sav\w+|shipped|delivered|launched)\b"
+    ),
+}
+
+SPECIFIC = re.compile(r"\d+(\.\d+)?\s*(%|x\b|ms\b|s\b|k\b|m\b|users|customers|people|hours|days|weeks|months)?")
+
+FEEDBACK_HINTS = {
+    "situation": "set the scene: where you were and what was going on",
+    "task": "say what you were responsible for",
+    "action": "describe the specific steps you took yourself",
+    "result": "finish with the outcome, ideally with a number",
+}
+
+
+def stem(word):
+    """Crude suffix stripping so "scaled", "scaling" and "scales" match "scale"."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def terms(text):
+    return [stem(word) for word in extract_keywords(text) if word not in STOPWORDS and not word.isdigit()]
+
+
+def cosine(a, b):
+    """Cosine similarity of two term count vectors."""
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[term] for term, count in a.items() if term in b)
+    return dot / math.sqrt(sum(v * v for v in a.values()) * sum(v * v for v in b.values()))
+
+
+@lru_cache(maxsize=64)
+def jd_terms(job_description_text):
+    """The job description's most frequent terms, computed once per description."""
+    return frozenset(term for term, _ in Counter(terms(job_description_text)).most_common(JD_TERMS))
+
+
+def answer_features(answer, question, job_description_text=""):
+    """Returns the feature values (each 0..1) of an answer."""
+    answer_terms = terms(answer)
+    answer_counts = Counter(answer_terms)
+    lowered = answer.lower()
+    key_skills = skill_set(job_description_text) if job_description_text else frozenset()
+    if key_skills:
+        covered = len(key_skills & extract_skills(answer).keys())
+    else:
+        key_skills = jd_terms(job_description_text) if job_description_text else frozenset()
+        covered = len(key_skills & answer_counts.keys())
+    star_parts = [part for part, cue in STAR_CUES.items() if cue.search(lowered)]
+    return {
+        "relevance": cosine(answer_counts, Counter(terms(question or ""))),
+        "jd_coverage": min(1.0, covered / min(len(key_skills), JD_COVERAGE_TARGET)) if key_skills else 0.0,
+        "star": len(star_parts) / len(STAR_CUES),
+        "length": min(1.0, math.log1p(len(answer.split())) / math.log1p(FULL_LENGTH_WORDS)),
+        "specificity": min(1.0, len(SPECIFIC.findall(answer)) / 3),
+        "missing_star": [part for part in STAR_CUES if part not in star_parts],
+    }
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """Calibrated weights if a weights file exists, otherwise the defaults."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return {**DEFAULT_WEIGHTS, **json.load(file)}
+    except (OSError, ValueError):
+        return dict(DEFAULT_WEIGHTS)
+
+
+active_weights = load_weights()
+
+
+def score_features(features, weights=None):
+    weights = weights or active_weights
+    score = weights["intercept"] + sum(weights[name] * features[name] for name in FEATURES)
+    return round(min(100.0, max(0.0, score)), 1)
+
+
+def score_answer(answer, question, job_description_text=""):
+    """Returns (score 0-100, features) for one answer."""
+    features = answer_features(answer, question, job_description_text)
+    return score_features(features), features
+
+
+def needs_llm_review(score):
+    return score >= LLM_REVIEW_MIN_SCORE
+
+
+def local_feedback(score, features):
+    """Short coaching for answers too weak to be worth an LLM evaluation."""
+    hints = [FEEDBACK_HINTS[part] for part in features["missing_star"]]
+    if features["relevance"] < 0.1:
+        hints.insert(0, "address the question directly")
+    lines = [f"Your answer scored {score:.0f}/100. To make it stronger:"]
+    lines += [f"- {hint}" for hint in hints or ["add a concrete example and its outcome"]]
+    return "\n".join(lines)
+
+
+# ==== Calibration ====
+REPORT_SCORE = re.compile(r"Score:\s*\**\s*(\d{1,3})\s*/\s*100")
+
+
+def stored_sessions(db_path):
+    """Yields (mean answer features, report score) for every stored session with a scored report."""
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT session_id, job_description_text, report FROM sessions WHERE report IS NOT NULL"
+        ).fetchall()
+        for session_id, job_description_text, report in rows:
+            match = REPORT_SCORE.search(report)
+            if not match:
+                continue
+            responses = [
+                json.loads(payload) for (payload,) in connection.execute(
+                    "SELECT payload FROM turns WHERE session_id = ? AND kind = 'response' ORDER BY turn_id",
+                    (session_id,),
+                )
+            ]
+            if not responses:
+                continue
+            features = [
+                answer_features(response["answer"], response["question"], job_description_text or "")
+                for response in responses
+            ]
+            mean = [sum(f[name] for f in features) / len(features) for name in FEATURES]
+            yield mean, float(match.group(1))
+    finally:
+        connection.close()
+
+
+def calibrate(samples, ridge=1.0):
+    """Fits weights to (features, LLM score) samples by ridge regression toward the defaults."""
+    X = np.array([[1.0, *features] for features, _ in samples])
+    y = np.array([score for _, score in samples])
+    prior = np.array([DEFAULT_WEIGHTS["intercept"], *(DEFAULT_WEIGHTS[name] for name in FEATURES)])
+    # Shrinking toward the defaults keeps a handful of sessions from producing wild weights
+    penalty = ridge * np.eye(len(prior))
+    fitted = np.linalg.solve(X.T @ X + penalty, X.T @ y + penalty @ prior)
+    predictions = X @ fitted
+    return (
+        {"intercept": float(fitted[0]), **{name: float(w) for name, w in zip(FEATURES, fitted[1:])}},
+        float(np.mean(np.abs(predictions - y))),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the local answer score against LLM report scores.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fit = subparsers.add_parser("calibrate", help="Fit weights from stored sessions")
+    fit.add_argument("--db", default=os.environ.get("SESSION_DB_PATH", "interview_sessions.db"))
+    fit.add_argument("--output", default=WEIGHTS_PATH)
+    fit.add_argument("--ridge", type=float, default=1.0)
+    args = parser.parse_args()
+
+    samples = list(stored_sessions(args.db))
+    if len(samples) < 5:
+        parser.error(f"need at least 5 scored sessions, found {len(samples)}")
+    before = float(np.mean([abs(score_features(dict(zip(FEATURES, f)), DEFAULT_WEIGHTS) - s) for f, s in samples]))
+    fitted, after = calibrate(samples, args.ridge)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(fitted, file, indent=2)
+    print(f"{len(samples)} sessions; mean absolute error {before:.1f} -> {after:.1f}; weights written to {args.output}")
+    passed = [score_features(dict(zip(FEATURES, f)), fitted) for f, s in samples if s >= PASSING_REPORT_SCORE]
+    if passed:
+        print(f"Lowest local score of a passed session: {min(passed):.1f} (keep LLM_REVIEW_MIN_SCORE below it)")
+
+
+if __name__ == "__main__":
+    main()
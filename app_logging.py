@@ -0,0 +1,111 @@
+"""Non-blocking logging for the app's "interviewer.*" loggers.
+
+Records are put on a bounded queue by the calling thread and written by one
+background thread, so a script rerun never waits on stdout/stderr. When the queue is
+full the record is dropped (and counted) instead of blocking.
+
+    LOG_LEVEL         minimum level (default INFO)
+    LOG_SAMPLE_RATE   fraction of records below WARNING that are kept (default 1.0)
+    LOG_QUEUE_SIZE    records buffered before dropping (default 10000)
+
+The writer redacts emails, phone numbers and long digit runs from every message, so
+a stray candidate detail does not end up in the logs.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import re
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+import metrics
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 1.0))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+"), "[email]"),
+    # Phone numbers and other long digit runs; dots are left alone so timings survive
+    (re.compile(r"\+?\d[\d\s()-]{7,}\d"), "[number]"),
+]
+
+
+def redact(text):
+    for pattern, replacement in REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class RedactingFilter(logging.Filter):
+    """Scrubs personal details from the formatted message; runs on the writer thread."""
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every warning and error, and a random fraction of everything below."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Drops records when the queue is full instead of blocking the caller."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+
+_listener = None
+_lock = threading.Lock()
+
+
+def configure():
+    """Routes the "interviewer" loggers through the queue; safe to call on every rerun."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        records = queue.Queue(LOG_QUEUE_SIZE)
+        output = logging.StreamHandler()
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+        output.addFilter(RedactingFilter())
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        handler = DroppingQueueHandler(records)
+        handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+        logger = logging.getLogger("interviewer")
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def attach_queued(logger, handler):
+    """Sends a logger's records to handler through a queue of its own and one writer thread.
+
+    For sinks such as telemetry that must keep every record and their own format, so they
+    cannot share the sampled, redacted stderr writer. The queue is unbounded: under load it
+    grows instead of dropping records, and the writer catches up when the load passes.
+    """
+    records = queue.Queue()
+    listener = QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(records))
+    return listener
@@ -0,0 +1,176 @@
+"""Headless batch screening: analyze a folder of resumes against one job description.
+
+Usage:
+    python batch_screen.py --job-description jd.pdf --resumes resumes/ --output results.jsonl
+
+Text extraction runs in a process pool. Gemini calls run in a thread pool whose
+workers share analyze_resume's rate limiter, so the job keeps --calls-per-minute
+requests going without going over it. Each result is appended to the JSONL output
+as soon as it completes; re-running the same command skips resumes that already
+have a successful result, so an interrupted job picks up where it stopped.
+
+With --top-k, resumes are first ranked locally (resume_index.ResumeIndex, BM25) and
+only the best matches are sent to Gemini. --index keeps that index on disk so later
+runs only extract resumes that are new to the folder.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+from pdf_extraction import MAX_WORKERS, extract_file_text
+from resume_index import ResumeIndex
+from interviewer_mode import RESUME_ANALYSIS_FAILED, analyze_resume, extract_text_from_pdf
+
+
+def load_completed(output_path):
+    """Returns the resume file names that already have a successful result in the output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interruption; the resume will be redone
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["file"])
+    return completed
+
+
+def list_resumes(folder):
+    """Returns the PDF files in folder, sorted by name."""
+    return sorted(
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if name.lower().endswith(".pdf")
+    )
+
+
+def start_extract_pool(workers):
+    """Process pool for PDF extraction (spawn: the parent may already run threads)."""
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def preselect(resume_paths, job_description_text, top_k, index_path=None, extract_workers=MAX_WORKERS):
+    """Ranks resumes against the job description locally and returns {path: score} for the top_k."""
+    index = ResumeIndex.open(index_path)
+    by_name = {os.path.basename(path): path for path in resume_paths}
+    missing = [path for name, path in by_name.items() if name not in index]
+    if missing:
+        with start_extract_pool(extract_workers) as extract_pool:
+            futures = {extract_pool.submit(extract_file_text, path): path for path in missing}
+            for future in as_completed(futures):
+                try:
+                    index.add(os.path.basename(futures[future]), future.result())
+                except Exception:
+                    # Unreadable files are reported by the screening pass
+                    continue
+        if index_path:
+            index.save(index_path)
+
+    ranked = index.rank(job_description_text, top_k, candidates=by_name)
+    print(f"pre-ranked {len(by_name)} resumes locally, keeping {len(ranked)}", file=sys.stderr)
+    return {by_name[name]: score for name, score in ranked}
+
+
+def screen_resume(resume_text, job_description_text):
+    """Runs one LLM analysis and returns the result fields for the output record."""
+    start = time.time()
+    try:
+        analysis = analyze_resume(resume_text, job_description_text)
+    except Exception as e:
+        return {"status": "error", "error": str(e), "seconds": round(time.time() - start, 2)}
+    if analysis == RESUME_ANALYSIS_FAILED:
+        return {"status": "error", "error": analysis, "seconds": round(time.time() - start, 2)}
+    return {"status": "ok", "analysis": analysis, "seconds": round(time.time() - start, 2)}
+
+
+def run_batch(job_description_path, resume_paths, output_path, calls_per_minute, llm_workers,
+              extract_workers=MAX_WORKERS, top_k=None, index_path=None):
+    """Screens resume_paths against the job description and appends results to output_path."""
+    with open(job_description_path, "rb") as jd_file:
+        job_description_text = extract_text_from_pdf(jd_file)
+
+    rank_scores = {}
+    if top_k:
+        rank_scores = preselect(resume_paths, job_description_text, top_k, index_path, extract_workers)
+        resume_paths = [path for path in resume_paths if path in rank_scores]
+
+    completed = load_completed(output_path)
+    pending = [path for path in resume_paths if os.path.basename(path) not in completed]
+    print(f"{len(completed)} already screened, {len(pending)} to go", file=sys.stderr)
+    if not pending:
+        return
+
+    analyze_resume.limiter.set_rate(calls_per_minute)
+
+    done = 0
+    extract_pool = start_extract_pool(extract_workers)
+    llm_pool = ThreadPoolExecutor(max_workers=llm_workers)
+    with extract_pool, llm_pool, open(output_path, "a", encoding="utf-8") as output:
+        extracting = {extract_pool.submit(extract_file_text, path): path for path in pending}
+        screening = {}
+        while extracting or screening:
+            finished, _ = wait(list(extracting) + list(screening), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in extracting:
+                    path = extracting.pop(future)
+                    try:
+                        resume_text = future.result()
+                    except Exception as e:
+                        result = {"status": "error", "error": f"extraction failed: {e}"}
+                    else:
+                        if resume_text.strip():
+                            screening[llm_pool.submit(screen_resume, resume_text, job_description_text)] = path
+                            continue
+                        result = {"status": "error", "error": "no text found in PDF"}
+                else:
+                    path = screening.pop(future)
+                    result = future.result()
+
+                record = {"file": os.path.basename(path), **result}
+                if path in rank_scores:
+                    record["rank_score"] = round(rank_scores[path], 4)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                done += 1
+                print(f"[{done}/{len(pending)}] {record['file']}: {record['status']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a folder of resumes against one job description.")
+    parser.add_argument("--job-description", required=True, help="Job description PDF")
+    parser.add_argument("--resumes", required=True, help="Folder containing resume PDFs")
+    parser.add_argument("--output", default="screening_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--calls-per-minute", type=float, default=5,
+                        help="Gemini request quota to stay within (default: 5, as in the app)")
+    parser.add_argument("--llm-workers", type=int, default=4,
+                        help="Concurrent Gemini requests; raise it if responses are slower than the quota interval")
+    parser.add_argument("--extract-workers", type=int, default=MAX_WORKERS, help="PDF extraction processes")
+    parser.add_argument("--top-k", type=int, help="Only send the k best local matches to Gemini")
+    parser.add_argument("--index", help="Resume index file (.npz) reused across runs with --top-k")
+    args = parser.parse_args()
+
+    run_batch(
+        args.job_description,
+        list_resumes(args.resumes),
+        args.output,
+        args.calls_per_minute,
+        args.llm_workers,
+        args.extract_workers,
+        args.top_k,
+        args.index,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measures serial vs parallel PDF page extraction to locate PARALLEL_PAGE_THRESHOLD.
+
+Usage: python benchmarks/bench_pdf_extraction.py [--pages 1 2 4 8 16 32 64] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_extraction  # noqa: E402
+
+LOREM = (
+    "Senior software engineer with experience in Python, distributed systems, "
+    "cloud infrastructure and data pipelines. Led a team of five engineers. "
+)
+
+
+def make_pdf(page_count, lines_per_page=45):
+    """Builds an in-memory text-heavy PDF with the given number of pages."""
+    doc = fitz.open()
+    for number in range(page_count):
+        page = doc.new_page()
+        body = "\n".join(f"{number}.{line} {LOREM}" for line in range(lines_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), body, fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def best_of(func, repeat):
+    """Returns the fastest wall time of `repeat` runs of func, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4, 8, 16, 24, 32, 48, 64])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=pdf_extraction.MAX_WORKERS)
+    args = parser.parse_args()
+
+    # Start the pool before timing so process start-up is not charged to the first size
+    pdf_extraction.extract_pages_parallel(make_pdf(2), 2, args.workers)
+
+    print(f"workers={args.workers} cpus={os.cpu_count()}")
+    print(f"{'pages':>6} {'serial ms':>10} {'parallel ms':>12} {'speedup':>8}")
+    crossover = None
+    for page_count in args.pages:
+        data = make_pdf(page_count)
+        serial = best_of(lambda: pdf_extraction.extract_pages_serial(data), args.repeat)
+        parallel = best_of(
+            lambda: pdf_extraction.extract_pages_parallel(data, page_count, args.workers), args.repeat
+        )
+        speedup = serial / parallel
+        if crossover is None and speedup > 1.0:
+            crossover = page_count
+        print(f"{page_count:>6} {serial:>10.1f} {parallel:>12.1f} {speedup:>7.2f}x")
+
+    if crossover is None:
+        print("parallel extraction never won; keep extraction serial on this machine")
+    else:
+        print(f"suggested PDF_PARALLEL_PAGE_THRESHOLD={crossover}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Offline load test: many simulated candidates running full interviews at once.
+
+Drives the async interview engine (interview_api) in-process over ASGI, with Gemini
+replaced by a fake backend that sleeps for a configurable latency. For each step of
+the session ramp it reports turn latency percentiles, throughput, memory per session
+and rate limiter wait time. Needs httpx for the in-process ASGI client.
+
+Usage:
+    python benchmarks/load_test.py --sessions 10 50 100 200 --llm-latency-ms 800
+    python benchmarks/load_test.py --sessions 50 --calls-per-minute 600   # see limiter queueing
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fitz  # PyMuPDF
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline: a dummy key is enough because no request leaves the process, and
+# sessions, banked questions and telemetry go to a throwaway directory, so fake
+# questions never reach the real bank and fake latencies never reach the data
+# the adaptive caps and hedging learn from
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+SCRATCH_DIR = tempfile.mkdtemp(prefix="load_test_")
+os.environ["SESSION_DB_PATH"] = os.path.join(SCRATCH_DIR, "sessions.db")
+os.environ["QUESTION_BANK_PATH"] = os.path.join(SCRATCH_DIR, "question_bank.db")
+os.environ["LLM_TELEMETRY_PATH"] = os.path.join(SCRATCH_DIR, "llm_calls.jsonl")
+
+import llm  # noqa: E402
+import routing  # noqa: E402
+from stats import percentile  # noqa: E402
+import interview_api  # noqa: E402
+from interviewer_mode import QUESTIONS_PER_INTERVIEW  # noqa: E402
+
+SCRIPTED_ANSWERS = [
+    "In my last role I led the migration of our billing service to Kubernetes, cutting deploy time by half.",
+    "I would start by clarifying the requirements, then sketch the data model and the API before coding.",
+    "We had a production outage; I organised the incident call, found the bad config and wrote the postmortem.",
+    "I use unit tests for the core logic and a small set of end-to-end tests for the critical user paths.",
+    "idk",
+]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel with a lognormal latency around a median."""
+
+    median_seconds = 0.8
+    sigma = 0.4
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def latency(self):
+        return random.lognormvariate(0, self.sigma) * self.median_seconds
+
+    def reply(self, prompt):
+        if "Generate a concise and relevant interview question" in prompt:
+            return "Tell me about a project where you had to scale a system under tight deadlines?"
+        if "overall score out of 100" in prompt:
+            return "Score: 72/100\n\nOverall Assessment:\nSolid answers with room for more detail."
+        return "Good structure. Add concrete metrics and explain the trade-offs you considered. " * 4
+
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        time.sleep(self.latency())
+        return FakeResponse(self.reply(prompt))
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, request_options=None):
+        delay = self.latency()
+        text = self.reply(prompt)
+        if not stream:
+            await asyncio.sleep(delay)
+            return FakeResponse(text)
+
+        async def chunks():
+            # First token after ~30% of the latency, the rest spread over the remainder
+            words = text.split(" ")
+            await asyncio.sleep(delay * 0.3)
+            for index in range(0, len(words), 8):
+                await asyncio.sleep(delay * 0.7 * 8 / len(words))
+                yield FakeResponse(" ".join(words[index:index + 8]) + " ")
+
+        return chunks()
+
+
+def make_pdf(page_count, text):
+    doc = fitz.open()
+    for _ in range(page_count):
+        doc.new_page().insert_textbox(fitz.Rect(36, 36, 576, 806), text * 20, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def run_candidate(client, resume_pdf, jd_pdf, turn_latencies, stream_every):
+    """One full interview: create, upload both documents, answer every question, fetch the report."""
+    session_id = (await client.post("/sessions")).json()["session_id"]
+    await client.put(f"/sessions/{session_id}/resume", content=resume_pdf)
+    await client.put(f"/sessions/{session_id}/job-description", content=jd_pdf)
+
+    for turn in range(QUESTIONS_PER_INTERVIEW):
+        start = time.perf_counter()
+        response = await client.post(f"/sessions/{session_id}/next-question")
+        response.raise_for_status()
+        answer = {"answer": SCRIPTED_ANSWERS[turn % len(SCRIPTED_ANSWERS)]}
+        if stream_every and turn % stream_every == 0:
+            async with client.stream("POST", f"/sessions/{session_id}/answer/stream", json=answer) as stream:
+                async for _ in stream.aiter_text():
+                    pass
+        else:
+            (await client.post(f"/sessions/{session_id}/answer", json=answer)).raise_for_status()
+        turn_latencies.append(time.perf_counter() - start)
+
+    (await client.get(f"/sessions/{session_id}/report")).raise_for_status()
+
+
+def limiter_totals():
+    limiters = [interview_api.generate_interview_question.limiter, interview_api.analyze_answer.limiter]
+    return sum(limiter.calls for limiter in limiters), sum(limiter.total_wait for limiter in limiters)
+
+
+async def run_step(session_count, resume_pdf, jd_pdf, stream_every, measure_memory):
+    interview_api.sessions.clear()
+    calls_before, wait_before = limiter_totals()
+    memory_before = tracemalloc.get_traced_memory()[0] if measure_memory else 0
+    turn_latencies = []
+
+    transport = httpx.ASGITransport(app=interview_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_candidate(client, resume_pdf, jd_pdf, turn_latencies, stream_every)
+            for _ in range(session_count)
+        ))
+        elapsed = time.perf_counter() - start
+
+    memory_per_session = 0
+    if measure_memory:
+        memory_per_session = (tracemalloc.get_traced_memory()[0] - memory_before) / session_count
+    calls, wait = limiter_totals()
+    calls -= calls_before
+    wait -= wait_before
+    return {
+        "sessions": session_count,
+        "turns": len(turn_latencies),
+        "turns_per_second": len(turn_latencies) / elapsed,
+        "p50": percentile(turn_latencies, 0.50) or 0.0,
+        "p95": percentile(turn_latencies, 0.95) or 0.0,
+        "p99": percentile(turn_latencies, 0.99) or 0.0,
+        "kb_per_session": memory_per_session / 1024,
+        "limiter_wait": wait / calls if calls else 0.0,
+    }
+
+
+async def main_async(args):
+    resume_pdf = make_pdf(args.resume_pages, "Python engineer, Kubernetes, PostgreSQL, led a team of four. ")
+    jd_pdf = make_pdf(1, "We are hiring a backend engineer with Python and cloud experience. ")
+
+    print(f"{'sessions':>8} {'turns':>6} {'turns/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'KB/sess':>8} {'wait/call s':>11}")
+    for session_count in args.sessions:
+        result = await run_step(session_count, resume_pdf, jd_pdf, args.stream_every, not args.no_memory)
+        print(f"{result['sessions']:>8} {result['turns']:>6} {result['turns_per_second']:>8.1f} "
+              f"{result['p50']:>7.2f} {result['p95']:>7.2f} {result['p99']:>7.2f} "
+              f"{result['kb_per_session']:>8.1f} {result['limiter_wait']:>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the interview engine.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 100, 200],
+                        help="Concurrent candidates for each ramp step")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Median fake Gemini latency")
+    parser.add_argument("--llm-sigma", type=float, default=0.4, help="Spread of the lognormal latency")
+    parser.add_argument("--calls-per-minute", type=float, default=1_000_000,
+                        help="Rate limiter setting; the default effectively disables it")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Hedge slow question and answer calls (off by default, see hedging.py)")
+    parser.add_argument("--resume-pages", type=int, default=2)
+    parser.add_argument("--stream-every", type=int, default=2,
+                        help="Use the streaming answer endpoint every Nth turn (0 = never)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows every allocation)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    FakeModel.median_seconds = args.llm_latency_ms / 1000
+    FakeModel.sigma = args.llm_sigma
+    llm.model_factory = FakeModel
+    for func in (
+        interview_api.generate_interview_question,
+        interview_api.analyze_answer,
+        interview_api.extract_profile,
+        interview_api.extract_section_profiles,
+    ):
+        func.limiter.set_rate(args.calls_per_minute)
+    if args.hedge:
+        for task in ("question", "answer_feedback"):
+            routing.routes[task]["hedge"] = True
+    if not args.no_memory:
+        tracemalloc.start()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
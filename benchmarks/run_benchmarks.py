@@ -0,0 +1,263 @@
+"""Micro-benchmarks for the app's hot paths, with a JSON baseline for regression checks.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py                      # compare against it, exit 1 on regression
+    python benchmarks/run_benchmarks.py --only extract_keywords --output results.json
+
+Each result is the median time per call over several repeats. A benchmark regresses
+when its median exceeds the baseline median by more than its threshold (default 25%).
+Baselines are machine specific: record them on the machine the comparison runs on.
+"""
+import argparse
+import io
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import threading
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import interviewer_mode  # noqa: E402
+from text_utils import extract_keywords  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+RESUME_LINE = (
+    "Senior backend engineer: Python, Go, PostgreSQL, Kafka, Kubernetes on AWS. "
+    "Led the rewrite of the payments API, cutting p99 latency from 900 ms to 120 ms. "
+)
+JD_LINE = (
+    "We are looking for a software engineer to design and operate distributed services. "
+    "Requirements: 5+ years of Python, cloud infrastructure, SQL and on-call experience. "
+)
+
+# Benchmark name -> (setup returning a zero-argument callable, regression threshold)
+BENCHMARKS = {}
+
+
+def benchmark(name, threshold=DEFAULT_THRESHOLD):
+    def register(setup):
+        BENCHMARKS[name] = (setup, threshold)
+        return setup
+    return register
+
+
+def make_pdf(page_count, line=RESUME_LINE, lines_per_page=40):
+    """Builds a deterministic text PDF fixture with the given number of pages."""
+    doc = fitz.open()
+    for number in range(page_count):
+        body = "\n".join(f"{number}.{index} {line}" for index in range(lines_per_page))
+        doc.new_page().insert_textbox(fitz.Rect(36, 36, 576, 806), body, fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def resume_text(page_count):
+    return "\n".join(RESUME_LINE for _ in range(40 * page_count))
+
+
+for _pages in (1, 5, 20, 50):
+    @benchmark(f"extract_text_from_pdf[{_pages}p]")
+    def _setup_extract(pages=_pages):
+        data = make_pdf(pages)
+        return lambda: interviewer_mode.extract_text_from_pdf(io.BytesIO(data))
+
+
+for _pages in (1, 5, 20):
+    @benchmark(f"extract_keywords[{_pages}p]")
+    def _setup_keywords(pages=_pages):
+        text = resume_text(pages)
+        return lambda: extract_keywords(text)
+
+
+@benchmark("SimpleCache.get_cache_key[5p]")
+def _setup_cache_key():
+    cache = interviewer_mode.SimpleCache()
+    text = resume_text(5)
+    return lambda: cache.get_cache_key("analyze_job_description", text)
+
+
+@benchmark("build_resume_prompt[5p]")
+def _setup_resume_prompt():
+    resume, jd = resume_text(5), JD_LINE * 40
+    return lambda: interviewer_mode.build_resume_prompt(resume, jd)
+
+
+@benchmark("build_job_description_prompt[2p]")
+def _setup_jd_prompt():
+    jd = JD_LINE * 80
+    return lambda: interviewer_mode.build_job_description_prompt(jd)
+
+
+@benchmark("build_question_prompt[5p]")
+def _setup_question_prompt():
+    resume, jd = resume_text(5), JD_LINE * 40
+    return lambda: interviewer_mode.build_question_prompt(jd, resume)
+
+
+@benchmark("build_answer_prompt")
+def _setup_answer_prompt():
+    question = "Tell me about a time you had to debug a production incident under pressure?"
+    answer = "I was on call when our checkout latency spiked. " * 10
+    return lambda: interviewer_mode.build_answer_prompt(answer, question)
+
+
+@benchmark("build_performance_prompt[5 turns]")
+def _setup_performance_prompt():
+    responses = [
+        {"question": "Q?" * 20, "answer": "A. " * 100, "feedback": "F. " * 300}
+        for _ in range(interviewer_mode.QUESTIONS_PER_INTERVIEW)
+    ]
+    return lambda: interviewer_mode.build_performance_prompt(interviewer_mode.format_interview_summary(responses))
+
+
+for _threads in (1, 8):
+    @benchmark(f"RateLimiter.acquire[{_threads} threads x 2000 calls]", threshold=0.5)
+    def _setup_limiter(threads=_threads, calls_per_thread=2000):
+        # The rate is high enough that nobody sleeps: this measures the bookkeeping and lock contention
+        limiter = interviewer_mode.RateLimiter(calls_per_minute=1e12)
+
+        def worker():
+            for _ in range(calls_per_thread):
+                limiter.acquire()
+
+        def run():
+            pool = [threading.Thread(target=worker) for _ in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+        return run
+
+
+def simulated_session(turns):
+    """Session state shaped like the Streamlit app's after `turns` answered questions."""
+    question = "Describe how you would design a rate limiter for a public API?"
+    answer = "I would use a token bucket per API key, stored in Redis. " * 6
+    feedback = "Good start. Mention burst handling, clock skew and how you would test it. " * 12
+    messages = [{"role": "assistant", "content": "Ask me anything to start your interview practice!"}]
+    responses = []
+    for turn in range(turns):
+        # Distinct strings per turn, as in a real interview (pickle would share identical ones)
+        turn_question, turn_answer, turn_feedback = (f"{text} [{turn}]" for text in (question, answer, feedback))
+        messages += [
+            {"role": "assistant", "content": turn_question},
+            {"role": "user", "content": turn_answer},
+            {"role": "assistant", "content": turn_feedback},
+        ]
+        responses.append({"question": turn_question, "answer": turn_answer, "feedback": turn_feedback})
+    return {"messages": messages, "user_responses": responses, "question_counter": turns}
+
+
+for _turns in (5, 50, 200):
+    @benchmark(f"session_state_rerun[{_turns} turns]")
+    def _setup_session(turns=_turns):
+        state = simulated_session(turns)
+
+        def run():
+            # What every rerun pays for the history: walk it to render, plus one pickle for size
+            for message in state["messages"]:
+                message["content"]
+            pickle.dumps(state)
+        return run
+
+
+def time_per_call(func, repeat, min_seconds):
+    """Returns (median, min) seconds per call, calibrating the loop count to min_seconds per repeat."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_seconds or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return statistics.median(samples), min(samples)
+
+
+def session_sizes():
+    """Pickled bytes of the simulated session state after N turns (reported, not thresholded)."""
+    return {turns: len(pickle.dumps(simulated_session(turns))) for turns in (1, 5, 50, 200)}
+
+
+def compare(results, baseline):
+    """Returns the names of benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if not reference:
+            continue
+        limit = reference["median_us"] * (1 + reference.get("threshold", DEFAULT_THRESHOLD))
+        result["baseline_us"] = reference["median_us"]
+        result["regressed"] = result["median_us"] > limit
+        if result["regressed"]:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the micro-benchmark suite.")
+    parser.add_argument("--only", nargs="+", help="Substrings of benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.1, help="Minimum duration of one repeat")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for name, (setup, threshold) in BENCHMARKS.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        median, best = time_per_call(setup(), args.repeat, args.min_seconds)
+        results[name] = {"median_us": round(median * 1e6, 3), "min_us": round(best * 1e6, 3), "threshold": threshold}
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": results,
+        "session_state_bytes": session_sizes(),
+    }
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file))
+
+    print(f"{'benchmark':<40} {'median us':>12} {'baseline us':>12}")
+    for name, result in results.items():
+        baseline = result.get("baseline_us")
+        flag = "  REGRESSED" if result.get("regressed") else ""
+        print(f"{name:<40} {result['median_us']:>12.2f} {baseline if baseline is not None else '-':>12}{flag}")
+    print("session state bytes by turns:", report["session_state_bytes"])
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
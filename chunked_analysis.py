@@ -0,0 +1,85 @@
+"""Map-reduce analysis of oversized job descriptions.
+
+A job description longer than CHUNKED_ANALYSIS_CHARS is split at paragraph
+boundaries into chunks of about CHUNK_CHARS. Each chunk is analyzed on its own,
+in parallel (map): short 5W1H notes for the analysis, a partial profile for the
+profile. The notes are then merged into the usual 5W1H analysis by one small call
+(reduce) that reads the notes instead of the document; partial profiles are merged
+locally. Shorter documents keep the single-call path.
+"""
+import os
+import re
+
+CHUNKED_ANALYSIS_CHARS = int(os.environ.get("CHUNKED_ANALYSIS_CHARS", 12000))
+CHUNK_CHARS = int(os.environ.get("CHUNK_CHARS", 6000))
+# Chunks analyzed at the same time; the shared rate limiter still spaces their calls
+CHUNK_WORKERS = 4
+
+# Output budget of one chunk's notes; the merged analysis gets the usual budget of its route
+CHUNK_NOTES_TOKENS = 400
+
+QUESTIONS = """        - Who is the ideal candidate for this role?
+        - What are the key responsibilities and qualifications?
+        - When and where will the role be performed?
+        - Why is this role important to the company?
+        - How should the candidate approach the tasks or challenges outlined in the description?"""
+
+
+def needs_chunking(text):
+    return len(text) > CHUNKED_ANALYSIS_CHARS
+
+
+def split_chunks(text, max_chars=CHUNK_CHARS):
+    """Packs paragraphs into chunks of at most max_chars; a longer paragraph is cut at line or word breaks."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind("\n", 0, max_chars)
+            if cut <= 0:
+                cut = paragraph.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            pieces.append(paragraph)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_chunk_notes_prompt(chunk, number, total):
+    """Builds the map prompt: terse 5W1H notes on one part of a job description."""
+    return f"""
+        The following is part {number} of {total} of a job description. Take short notes on what this part
+        says for each of these questions, as bullet points of a few words each. Leave out a question this
+        part says nothing about, and note the company name if it appears.
+{QUESTIONS}
+
+        Part {number}:
+        {chunk}
+        """
+
+
+def build_merge_notes_prompt(notes):
+    """Builds the reduce prompt: one 5W1H analysis from the notes on every part."""
+    numbered = "\n\n".join(f"        Part {number}:\n        {note}" for number, note in enumerate(notes, 1))
+    return f"""
+        Below are notes taken on each part of one long job description. Using them, analyze the job
+        description using the 5Ws and 1H framework:
+{QUESTIONS}
+
+        Additionally, if the company name is mentioned, provide a brief background on the company.
+
+        Notes:
+{numbered}
+        """
@@ -0,0 +1,108 @@
+"""Per-call deadlines and hedged requests, to keep the slow tail of model latency
+out of interactive turns.
+
+A turn sets a deadline (with deadline(TURN_BUDGET_SECONDS)) and every model call
+made inside it, in threads and asyncio tasks alike, gets what is left of it: the
+rate limiter will not wait past it, the request timeout is cut down to it, and a
+call that starts after it raises DeadlineExceeded, so the turn can answer with
+local feedback instead of stalling.
+
+Routes with "hedge" set (routing.py) may send a second, identical request when the
+first has not answered after the route's recent p95 latency. The first reply wins
+and the other is cancelled. A hedge is only sent if the caller's rate limiter has
+a free slot right now (RateLimiter.try_reserve), so hedging never queues behind
+other calls and never pushes us past the quota into 429s.
+
+No route is hedged by default. At the app's 5 calls per minute a slot is only
+free after 12 idle seconds, so a hedge would rarely be sent, and the load test
+shows no gain from hedging unless the limiters allow far more calls. Turn it on
+in MODEL_ROUTES (e.g. {"answer_feedback": {"hedge": true}}) along with a quota
+and limiter rates that leave spare slots.
+
+    TURN_BUDGET_SECONDS   time budget of one interview turn (default 20)
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from stats import percentile
+
+TURN_BUDGET_SECONDS = float(os.environ.get("TURN_BUDGET_SECONDS", 20))
+
+# Recent latencies kept per route, and how many are needed before hedging
+WINDOW = 200
+MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(seconds):
+    """Calls inside must finish within seconds; an enclosing, earlier deadline still applies."""
+    current = _deadline.get()
+    ends = time.monotonic() + seconds
+    token = _deadline.set(ends if current is None else min(current, ends))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left before the current deadline, or None without one."""
+    ends = _deadline.get()
+    return None if ends is None else ends - time.monotonic()
+
+
+def call_timeout(timeout):
+    """The request timeout to use: timeout, cut down to the current deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Turn deadline passed before the call started")
+    return min(timeout, left) if timeout else left
+
+
+@contextmanager
+def deadline_errors():
+    """Reports a request that failed because the deadline passed (e.g. its timeout) as DeadlineExceeded."""
+    try:
+        yield
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("Request did not finish before the turn deadline") from e
+        raise
+
+
+class LatencyTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}   # route -> deque of request seconds
+
+    def observe(self, task, seconds):
+        with self.lock:
+            self.samples.setdefault(task, deque(maxlen=WINDOW)).append(seconds)
+
+    def hedge_delay(self, task):
+        """Seconds to wait for a route's reply before hedging, or None until enough replies are seen."""
+        with self.lock:
+            samples = list(self.samples.get(task, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return percentile(samples, HEDGE_PERCENTILE)
+
+
+latencies = LatencyTracker()
+
@@ -0,0 +1,266 @@
+"""Timing of Streamlit reruns and of every LLM call.
+
+Rerun stages are only recorded while a RerunTimer is active (the opt-in sidebar
+panel). LLM calls always get one record, filled in by hooks in the rate limiter and
+llm.py and written to the telemetry sink: limiter wait, network time and the rest
+(tenacity backoff and our own overhead), time to first token, tokens, retries,
+cache outcome, truncation, hedging, and for routed calls the route, output cap and
+estimated cost.
+"""
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import metrics
+import routing
+import telemetry
+
+logger = logging.getLogger("interviewer.timing")
+
+_timer = contextvars.ContextVar("rerun_timer", default=None)
+_call = contextvars.ContextVar("llm_call", default=None)
+
+
+class RerunTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []      # [(name, seconds)] in the order they finished
+        self.llm_calls = []   # one dict per LLM call
+        self.total = None
+
+    def summary(self):
+        """Returns the timings as a JSON-serializable dict."""
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        staged = sum(seconds for _, seconds in self.stages)
+        return {
+            "total": round(total, 4),
+            "stages": [{"name": name, "seconds": round(seconds, 4)} for name, seconds in self.stages],
+            # Time outside any named stage: widget rendering, session state handling
+            "unstaged": round(max(0.0, total - staged), 4),
+            "llm_calls": self.llm_calls,
+        }
+
+
+def start_rerun():
+    """Starts timing the current rerun and returns its timer."""
+    timer = RerunTimer()
+    _timer.set(timer)
+    return timer
+
+
+def finish_rerun(timer):
+    """Stops timing and writes the summary to the structured log."""
+    timer.total = time.perf_counter() - timer.started
+    _timer.set(None)
+    logger.info(json.dumps({"event": "rerun_timing", **timer.summary()}))
+    return timer.summary()
+
+
+@contextmanager
+def stage(name):
+    """Times a named stage of the rerun, if timing is on."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.stages.append((name, time.perf_counter() - start))
+
+
+def new_record(function_name):
+    return {
+        "function": function_name,
+        "route": None,
+        "model": None,
+        "max_output_tokens": None,
+        "limiter_wait": 0.0,
+        "network": 0.0,
+        "ttft": None,
+        "attempts": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "truncated": False,
+        "hedged": False,
+        "cost_usd": 0.0,
+        "cache": None,
+        "status": "ok",
+    }
+
+
+def finish_record(record, total, timer=None):
+    """Completes a record that took total seconds and writes it to the telemetry sink and metrics."""
+    record["total"] = total
+    record["other"] = max(0.0, record["total"] - record["limiter_wait"] - record["network"])
+    record["retries"] = max(0, record["attempts"] - 1)
+    for key in ("limiter_wait", "network", "total", "other", "ttft"):
+        if record[key] is not None:
+            record[key] = round(record[key], 4)
+    record["cost_usd"] = round(record["cost_usd"], 8)
+    telemetry.emit(record)
+    metrics.LLM_CALLS.labels(record["function"], record["status"]).inc()
+    metrics.LLM_CALL_SECONDS.labels(record["function"]).observe(record["total"])
+    if record["route"] is not None:
+        metrics.LLM_ROUTE_SECONDS.labels(record["route"], record["model"] or "").observe(record["total"])
+        metrics.LLM_COST.labels(record["route"], record["model"] or "").inc(record["cost_usd"])
+    if timer is not None:
+        timer.llm_calls.append(record)
+
+
+@contextmanager
+def llm_call_record(function_name):
+    """Collects one record for an LLM-calling function; works in threads and in asyncio tasks.
+
+    The record is always written to the telemetry sink, and added to the rerun timer
+    when timing is on.
+    """
+    record = new_record(function_name)
+    timer = _timer.get()
+    token = _call.set(record)
+    metrics.LLM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _call.reset(token)
+        metrics.LLM_IN_FLIGHT.dec()
+        finish_record(record, time.perf_counter() - start, timer)
+
+
+# Function name of the record of a hedged request that finished after its call
+LATE_HEDGE = "late_hedged_request"
+
+
+@contextmanager
+def request_record(record):
+    """Records the model requests made inside in record instead of the current call's record.
+
+    Used for the requests of a hedged call (llm.generate_hedged): the losing one may finish
+    after the call's record has been written, so each collects its usage apart.
+    """
+    token = _call.set(record)
+    try:
+        yield record
+    finally:
+        _call.reset(token)
+
+
+def add_request(record):
+    """Adds the usage of a finished request collected by request_record to the current call's record."""
+    call = _call.get()
+    if call is None:
+        return
+    for key in ("network", "attempts", "input_tokens", "output_tokens", "cost_usd"):
+        call[key] += record[key]
+    for key in ("route", "model", "max_output_tokens", "ttft"):
+        if record[key] is not None:
+            call[key] = record[key]
+    call["truncated"] = call["truncated"] or record["truncated"]
+
+
+def finish_late_request(record):
+    """Writes a request that finished after its call as a record of its own, so its tokens and cost still count."""
+    record["function"] = LATE_HEDGE
+    record["hedged"] = True
+    finish_record(record, record["network"])
+
+
+def llm_call(func):
+    """Decorator for LLM-calling functions: one llm_call_record per call."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with llm_call_record(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def add_limiter_wait(seconds):
+    """Called by the rate limiter with the time a call waited for its slot."""
+    record = _call.get()
+    if record is not None:
+        record["limiter_wait"] += seconds
+
+
+def add_network_time(seconds, ttft=None):
+    """Called by llm.py with the duration of one request to the model (and its time to first token)."""
+    metrics.LLM_REQUESTS.inc()
+    record = _call.get()
+    if record is not None:
+        record["network"] += seconds
+        record["attempts"] += 1
+        record["ttft"] = seconds if ttft is None else ttft
+
+
+def set_route(task, max_output_tokens):
+    """Called by llm.py with the route and output cap of the call about to be sent."""
+    record = _call.get()
+    if record is not None:
+        record["route"] = task
+        record["max_output_tokens"] = max_output_tokens
+
+
+def mark_truncated():
+    """Called by llm.py when a reply stopped at its output cap."""
+    record = _call.get()
+    route = None
+    if record is not None:
+        record["truncated"] = True
+        route = record["route"]
+    metrics.LLM_TRUNCATED.labels(route or "").inc()
+
+
+def mark_hedged():
+    """Called by llm.py when a second request is sent for a slow call."""
+    record = _call.get()
+    if record is not None:
+        record["hedged"] = True
+
+
+def add_usage(model_name, response):
+    """Called by llm.py with a finished response, to record the model and token counts."""
+    record = _call.get()
+    if record is None:
+        return
+    record["model"] = model_name
+    # A retry that succeeded clears the failure of the earlier attempt
+    record["status"] = "ok"
+    record.pop("error", None)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        record["input_tokens"] += input_tokens
+        record["output_tokens"] += output_tokens
+        record["cost_usd"] += routing.cost(model_name, input_tokens, output_tokens)
+
+
+def mark_failed(error):
+    """Called by llm.py when a request to the model fails."""
+    if is_rate_limited(error):
+        metrics.LLM_RATE_LIMITED.inc()
+    record = _call.get()
+    if record is not None:
+        record["status"] = "error"
+        record["error"] = type(error).__name__
+
+
+def mark_cache(outcome):
+    """Records "hit" or "miss" for functions that consult a cache before calling the model."""
+    metrics.CACHE_LOOKUPS.labels(outcome).inc()
+    record = _call.get()
+    if record is not None:
+        record["cache"] = outcome
+
+
+def is_rate_limited(error):
+    """True for quota errors (HTTP 429, google.api_core ResourceExhausted)."""
+    return getattr(error, "code", None) == 429 or type(error).__name__ == "ResourceExhausted"
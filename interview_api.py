@@ -0,0 +1,457 @@
+"""Headless HTTP API for the interview engine.
+
+Run with:
+    uvicorn interview_api:app --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /sessions                             create a session
+    PUT  /sessions/{id}/resume                 upload the resume (raw PDF body)
+    PUT  /sessions/{id}/job-description        upload the job description (raw PDF body)
+    POST /sessions/{id}/next-question          next interview question, from the question bank or generated
+    POST /sessions/{id}/answer                 answer the current question, get feedback
+    POST /sessions/{id}/answer/stream          same, with feedback streamed as server-sent events
+    GET  /sessions/{id}/report                 final score and assessment
+    GET  /metrics                              Prometheus metrics
+
+Gemini calls are awaited instead of blocking a thread, and wait for the same rate
+limiters as the Streamlit app, so one process can hold many concurrent interviews.
+Sessions are persisted in the SessionStore and reloaded on first use after a restart.
+Only recently used sessions stay in memory: idle and finished ones are evicted, and
+reloaded from the store if they are used again.
+
+    API_MAX_SESSIONS           sessions kept in memory at most (default 5000)
+    API_SESSION_IDLE_SECONDS   idle time after which a session is evicted (default 1800)
+"""
+import asyncio
+import io
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from tenacity import AsyncRetrying, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+import instrumentation
+import metrics
+from answer_filter import canned_feedback
+from answer_scoring import local_feedback, needs_llm_review, score_answer
+from llm import generate_hedged_async, generate_routed_async, stream_routed_async
+from hedging import TURN_BUDGET_SECONDS, DeadlineExceeded, deadline
+from near_duplicates import load_history, remember
+from profiles import (
+    build_profile_prompt,
+    build_sections_profile_prompt,
+    merge_profiles,
+    parse_profile,
+    parse_section_profiles,
+    profile_text,
+)
+from resume_sections import section_key, split_sections
+from chunked_analysis import needs_chunking, split_chunks
+from question_bank import QuestionBank, question_difficulty
+from session_store import SessionStore
+from text_utils import document_hash
+from interviewer_mode import (
+    PROFILE_MAX_TOKENS,
+    QUESTION_ATTEMPTS,
+    SECTION_PROFILE_TOKENS,
+    QUESTIONS_PER_INTERVIEW,
+    analyze_answer,
+    analyze_interview_performance,
+    build_answer_prompt,
+    build_performance_prompt,
+    build_question_prompt,
+    extract_job_description_chunk_profile,
+    extract_profile,
+    extract_section_profiles,
+    extract_text_and_prefix,
+    format_interview_summary,
+    generate_interview_question,
+    is_repeat,
+    session_state_bytes,
+)
+
+app = FastAPI(title="Interviewer ChatBot AI")
+
+# session id -> session state, with the same keys the Streamlit app keeps in st.session_state;
+# least recently used first
+sessions = OrderedDict()
+MAX_SESSIONS = int(os.environ.get("API_MAX_SESSIONS", 5000))
+SESSION_IDLE_SECONDS = float(os.environ.get("API_SESSION_IDLE_SECONDS", 30 * 60))
+# A finished interview only needs to stay for its report request
+FINISHED_IDLE_SECONDS = 60
+# Idle sessions are looked for at most this often
+SWEEP_SECONDS = 30
+last_sweep = time.monotonic()
+store = SessionStore()
+bank = QuestionBank()
+
+metrics.ACTIVE_SESSIONS.set_function(lambda: len(sessions))
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+def new_session_state():
+    """Returns the initial state of an interview session."""
+    return {
+        "messages": [{"role": "assistant", "content": "Ask me anything to start your interview practice!"}],
+        "current_question": None,
+        "user_responses": [],
+        "question_counter": 0,
+        "interview_completed": False,
+        "resume_text": "",
+        "resume_prefix": "",
+        "job_description_text": "",
+        "job_description_prefix": "",
+        # Profile text of each document, what question prompts see of it
+        "resume_context": None,
+        "job_description_context": None,
+        "report": None,
+        # SketchIndex of the candidate's earlier questions, loaded on the first question
+        "asked_questions": None,
+        # Serializes turns within one session; different sessions run concurrently
+        "lock": asyncio.Lock(),
+        # time.monotonic() of the last request, for eviction
+        "last_used": time.monotonic(),
+    }
+
+
+def evict_sessions():
+    """Drops idle and finished sessions from memory, and the least recently used ones past MAX_SESSIONS.
+
+    A session with a turn in progress (its lock held) is never dropped.
+    """
+    global last_sweep
+    now = time.monotonic()
+    if now - last_sweep >= SWEEP_SECONDS:
+        last_sweep = now
+        for session_id, session in list(sessions.items()):
+            idle = now - session["last_used"]
+            limit = FINISHED_IDLE_SECONDS if session["interview_completed"] else SESSION_IDLE_SECONDS
+            if idle >= limit and not session["lock"].locked():
+                del sessions[session_id]
+    for session_id in list(sessions)[:max(0, len(sessions) - MAX_SESSIONS)]:
+        if not sessions[session_id]["lock"].locked():
+            del sessions[session_id]
+
+
+async def get_session(session_id):
+    if session_id not in sessions:
+        # The load waits for queued writes to commit, so it runs off the event loop
+        saved = await asyncio.to_thread(store.load, session_id)
+        if saved is None:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        session = new_session_state()
+        saved["messages"] = session["messages"] + saved["messages"]
+        session.update(saved)
+        # A concurrent request may have restored the session meanwhile; keep the first copy and its lock
+        sessions.setdefault(session_id, session)
+    session = sessions[session_id]
+    session["last_used"] = time.monotonic()
+    sessions.move_to_end(session_id)
+    evict_sessions()
+    return session
+
+
+def save(session_id, session, **fields):
+    """Updates session fields in memory and in the store."""
+    session.update(fields)
+    store.save_fields(session_id, **fields)
+
+
+def add_message(session_id, session, role, content):
+    session["messages"].append({"role": role, "content": content})
+    store.append_turn(session_id, "message", {"role": role, "content": content})
+
+
+def session_summary(session_id, session):
+    return {
+        "session_id": session_id,
+        "current_question": session["current_question"],
+        "question_counter": session["question_counter"],
+        "interview_completed": session["interview_completed"],
+    }
+
+
+async def call_llm(func, task, prompt, **overrides):
+    """Runs one Gemini call on task's model route, under func's rate limiter and the app's retry policy.
+
+    Inside a deadline the call raises DeadlineExceeded once it has passed, without further retries.
+    """
+    with instrumentation.llm_call_record(func.__name__):
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_exponential(multiplier=1, min=4, max=10),
+            retry=retry_if_not_exception_type(DeadlineExceeded),
+            reraise=True,
+        ):
+            with attempt:
+                limiter = getattr(func, "limiter", None)
+                if not limiter:
+                    return await generate_routed_async(task, prompt, **overrides)
+                await limiter.acquire_async()
+                # A slow call may be hedged with a second request if the limiter has a spare slot
+                return await generate_hedged_async(task, prompt, limiter, **overrides)
+
+
+def screen_answer(session, answer):
+    """Scores an answer locally; returns (score, feedback), feedback None when the model should review it."""
+    question = session["current_question"]
+    score, features = score_answer(answer, question, session["job_description_text"])
+    feedback = canned_feedback(answer, question)
+    if feedback is None and not needs_llm_review(score):
+        feedback = local_feedback(score, features)
+    return score, feedback
+
+
+def record_answer(session_id, session, answer, feedback, score=None):
+    """Stores an answered turn, mirroring llm_function in the Streamlit app."""
+    add_message(session_id, session, "user", answer)
+    add_message(session_id, session, "assistant", feedback)
+    response = {"question": session["current_question"], "answer": answer, "feedback": feedback, "score": score}
+    session["user_responses"].append(response)
+    store.append_turn(session_id, "response", response)
+    metrics.TURNS.inc()
+    metrics.SESSION_STATE_BYTES.observe(session_state_bytes(session))
+    question_counter = session["question_counter"] + 1
+    save(
+        session_id,
+        session,
+        question_counter=question_counter,
+        current_question=None,
+        interview_completed=question_counter >= QUESTIONS_PER_INTERVIEW,
+    )
+
+
+def check_can_answer(session):
+    if session["interview_completed"]:
+        raise HTTPException(status_code=409, detail="Interview already completed")
+    if not session["current_question"]:
+        raise HTTPException(status_code=409, detail="No open question; request the next question first")
+
+
+@app.post("/sessions", status_code=201)
+async def create_session():
+    session_id = store.create(uuid.uuid4().hex)
+    sessions[session_id] = new_session_state()
+    evict_sessions()
+    return {"session_id": session_id}
+
+
+async def upload(session_id, request, field):
+    session = await get_session(session_id)
+    body = await request.body()
+    if not body:
+        raise HTTPException(status_code=400, detail="Request body must be a PDF file")
+    try:
+        # PDF parsing is CPU work; keep it off the event loop
+        text, prefix = await asyncio.to_thread(extract_text_and_prefix, io.BytesIO(body))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read the PDF")
+    if not text.strip():
+        raise HTTPException(status_code=422, detail="No text found in the PDF")
+    save(session_id, session, **{f"{field}_text": text, f"{field}_prefix": prefix})
+    # Extract the profile now, so the first question does not wait for it
+    session[f"{field}_context"] = None
+    await document_context(session, field)
+    return {"session_id": session_id, "characters": len(text)}
+
+
+@app.put("/sessions/{session_id}/resume")
+async def upload_resume(session_id: str, request: Request):
+    return await upload(session_id, request, "resume")
+
+
+@app.put("/sessions/{session_id}/job-description")
+async def upload_job_description(session_id: str, request: Request):
+    return await upload(session_id, request, "job_description")
+
+
+async def extract_resume_profile(text):
+    """Mirrors extract_resume_profile in the app: only sections not seen before go to the model."""
+    sections = split_sections(text)
+    keys = [section_key(title, body, None) for title, body in sections]
+    partials = await asyncio.to_thread(store.load_profiles, keys)
+    missing = [i for i, key in enumerate(keys) if key not in partials and sections[i][1]]
+    if missing:
+        prompt = build_sections_profile_prompt([sections[i] for i in missing])
+        max_output_tokens = min(2 * PROFILE_MAX_TOKENS, SECTION_PROFILE_TOKENS * len(missing))
+        reply = await call_llm(extract_section_profiles, "profile", prompt, max_output_tokens=max_output_tokens)
+        extracted = parse_section_profiles(reply, len(missing))
+        for number, i in enumerate(missing, 1):
+            if number in extracted:
+                partials[keys[i]] = extracted[number]
+                store.save_profile(keys[i], "resume_section", extracted[number])
+    found = [partials[key] for key in keys if key in partials]
+    return merge_profiles(found, text) if found else None
+
+
+async def extract_job_description_profile(text):
+    """Mirrors extract_job_description_profile in the app: an oversized document is extracted per chunk."""
+    chunked = needs_chunking(text)
+    chunks = split_chunks(text) if chunked else [text]
+    # Chunks share the job description analysis limiter, as in the app
+    func = extract_job_description_chunk_profile if chunked else extract_profile
+    prompts = [build_profile_prompt(chunk, "job_description") for chunk in chunks]
+    replies = await asyncio.gather(*(call_llm(func, "profile", prompt) for prompt in prompts))
+    partials = [parse_profile(reply, chunk, "job_description") for reply, chunk in zip(replies, chunks)]
+    partials = [profile for profile in partials if profile]
+    return merge_profiles(partials, text, "job_description") if partials else None
+
+
+async def document_context(session, field):
+    """Mirrors document_context in the app: the document's profile text, extracted once per document."""
+    if session[f"{field}_context"] is None:
+        text = session[f"{field}_text"]
+        key = document_hash(text)
+        profile = await asyncio.to_thread(store.load_profile, key)
+        if profile is None:
+            try:
+                if field == "resume":
+                    profile = await extract_resume_profile(text)
+                else:
+                    profile = await extract_job_description_profile(text)
+            except Exception:
+                profile = None
+            if profile:
+                store.save_profile(key, field, profile)
+        # Without a profile, prompts fall back to the leading pages
+        session[f"{field}_context"] = profile_text(profile) if profile else session[f"{field}_prefix"]
+    return session[f"{field}_context"]
+
+
+async def pick_question(session):
+    """Mirrors next_interview_question: a banked question if one fits, else a generated one, skipping repeats."""
+    job_description_text = await document_context(session, "job_description")
+    resume_text = await document_context(session, "resume")
+    candidate = document_hash(session["resume_text"])
+    seen = session["asked_questions"]
+    if seen is None or seen.key != candidate:
+        seen = session["asked_questions"] = await asyncio.to_thread(load_history, store, candidate)
+    avoid = [response["question"] for response in session["user_responses"]]
+    difficulty = question_difficulty(len(avoid), QUESTIONS_PER_INTERVIEW)
+    question = None
+    for _ in range(QUESTION_ATTEMPTS):
+        question = bank.find(job_description_text, resume_text, difficulty, exclude=avoid)
+        if question is None or not is_repeat(seen, question, "bank"):
+            break
+        avoid.append(question)
+        question = None
+    attempt = 0
+    while question is None:
+        attempt += 1
+        prompt = build_question_prompt(job_description_text, resume_text, avoid)
+        question = await call_llm(generate_interview_question, "question", prompt)
+        if attempt < QUESTION_ATTEMPTS and is_repeat(seen, question, "generated"):
+            avoid.append(question)
+            question = None
+            continue
+        await asyncio.to_thread(bank.add, question, job_description_text, resume_text, difficulty)
+    remember(store, seen, question)
+    return question
+
+
+@app.post("/sessions/{session_id}/next-question")
+async def next_question(session_id: str):
+    session = await get_session(session_id)
+    async with session["lock"]:
+        if session["interview_completed"]:
+            raise HTTPException(status_code=409, detail="Interview already completed")
+        if not session["resume_text"] or not session["job_description_text"]:
+            raise HTTPException(status_code=409, detail="Upload both the resume and the job description first")
+        if not session["current_question"]:
+            try:
+                question = await pick_question(session)
+            except Exception:
+                raise HTTPException(status_code=503, detail="Could not generate a question at this time")
+            save(session_id, session, current_question=question)
+            add_message(session_id, session, "assistant", question)
+        return session_summary(session_id, session)
+
+
+@app.post("/sessions/{session_id}/answer")
+async def answer(session_id: str, body: Answer):
+    session = await get_session(session_id)
+    async with session["lock"]:
+        check_can_answer(session)
+        score, feedback = screen_answer(session, body.answer)
+        if feedback is None:
+            prompt = build_answer_prompt(body.answer, session["current_question"])
+            try:
+                with deadline(TURN_BUDGET_SECONDS):
+                    feedback = await call_llm(analyze_answer, "answer_feedback", prompt)
+            except DeadlineExceeded:
+                # Past the turn budget the candidate gets the local feedback instead
+                _, features = score_answer(body.answer, session["current_question"], session["job_description_text"])
+                feedback = local_feedback(score, features)
+            except Exception:
+                raise HTTPException(status_code=503, detail="Could not analyze the answer at this time")
+        record_answer(session_id, session, body.answer, feedback, score)
+        return {"feedback": feedback, "answer_score": score, **session_summary(session_id, session)}
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/sessions/{session_id}/answer/stream")
+async def answer_stream(session_id: str, body: Answer):
+    session = await get_session(session_id)
+    # Checked here for the HTTP status, and again under the lock once the body starts streaming:
+    # a lock taken here would never be released if the client left before the body was iterated
+    check_can_answer(session)
+
+    async def events():
+        async with session["lock"]:
+            try:
+                check_can_answer(session)
+            except HTTPException as e:
+                yield sse("error", {"detail": e.detail})
+                return
+            try:
+                chunks = []
+                score, coaching = screen_answer(session, body.answer)
+                yield sse("score", {"answer_score": score})
+                if coaching:
+                    chunks.append(coaching)
+                    yield sse("token", {"text": coaching})
+                else:
+                    with instrumentation.llm_call_record(analyze_answer.__name__):
+                        await analyze_answer.limiter.acquire_async()
+                        prompt = build_answer_prompt(body.answer, session["current_question"])
+                        async for chunk in stream_routed_async("answer_feedback", prompt):
+                            chunks.append(chunk)
+                            yield sse("token", {"text": chunk})
+                record_answer(session_id, session, body.answer, "".join(chunks).strip(), score)
+                yield sse("done", session_summary(session_id, session))
+            except Exception:
+                yield sse("error", {"detail": "Could not analyze the answer at this time"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/sessions/{session_id}/report")
+async def report(session_id: str):
+    session = await get_session(session_id)
+    async with session["lock"]:
+        if not session["user_responses"]:
+            raise HTTPException(status_code=409, detail="No answers recorded yet")
+        if session["report"] is None or not session["interview_completed"]:
+            prompt = build_performance_prompt(format_interview_summary(session["user_responses"]))
+            try:
+                report_text = await call_llm(analyze_interview_performance, "report", prompt)
+            except Exception:
+                raise HTTPException(status_code=503, detail="Could not produce the report at this time")
+            save(session_id, session, report=report_text)
+        return {"report": session["report"], **session_summary(session_id, session)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -2,38 +2,156 @@ import google.generativeai as genai
 import os
 import streamlit as st
 from dotenv import load_dotenv
-import fitz  # PyMuPDF
+from pdf_extraction import extract_text_from_bytes, iter_pages
+from text_utils import document_hash
+from skills import format_skills, skill_set
+from answer_filter import canned_feedback
+from answer_scoring import local_feedback, needs_llm_review, score_answer
+from llm import generate_hedged, generate_routed
+from hedging import TURN_BUDGET_SECONDS, DeadlineExceeded, deadline, remaining
+from routing import route
+from question_bank import QuestionBank, question_difficulty
+from near_duplicates import load_history, remember
+from profiles import (
+    build_profile_prompt,
+    build_sections_profile_prompt,
+    merge_profiles,
+    parse_profile,
+    parse_section_profiles,
+    profile_text,
+)
+from resume_sections import (
+    MAX_OUTPUT_TOKENS as SECTION_ANALYSIS_MAX_TOKENS,
+    TOKENS_PER_SECTION,
+    build_section_prompt,
+    merge_section_analyses,
+    parse_section_analyses,
+    section_key,
+    split_sections,
+)
+from chunked_analysis import (
+    CHUNK_NOTES_TOKENS,
+    CHUNK_WORKERS,
+    build_chunk_notes_prompt,
+    build_merge_notes_prompt,
+    needs_chunking,
+    split_chunks,
+)
+from session_store import SessionStore
+import app_logging
+import instrumentation
+import logging
+import metrics
+from instrumentation import stage
 import re
 from streamlit.components.v1 import html
 import time
-from tenacity import retry, stop_after_attempt, wait_exponential
+import threading
+import asyncio
+import weakref
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from datetime import datetime, timedelta
 import hashlib
 import json
 from functools import wraps
+import contextvars
+import cProfile
+import pstats
+import io
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
 
 genai.configure(api_key=os.environ["GEMINI_API_KEY"])
 
+app_logging.configure()
+logger = logging.getLogger("interviewer.app")
+
 # Define all your functions here
 def extract_text_from_pdf(file):
     """Extracts text from a PDF file-like object uploaded via Streamlit."""
-    text = ""
-    with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-
-    # Print the extracted text to debug
-    print("Extracted Text: ", text[:1000])  # Only print the first 1000 characters for debugging
+    start = time.perf_counter()
+    text = extract_text_from_bytes(file.read())
+    metrics.PDF_EXTRACTION_SECONDS.observe(time.perf_counter() - start)
+    # Sizes only: document text never goes to the logs
+    logger.debug("Extracted %d characters from PDF", len(text))
     return text
 
+# Number of answered questions after which the final report is produced
+QUESTIONS_PER_INTERVIEW = 5
+
+# Tries to find a question the candidate has not had yet before settling for a repeat
+QUESTION_ATTEMPTS = 2
+# Earlier questions listed in the prompt as ones not to repeat
+MAX_AVOIDED_QUESTIONS = 10
+
+# Only the first pages of each document are sent for time-critical question generation
+QUESTION_PREFIX_PAGES = int(os.environ.get("QUESTION_PREFIX_PAGES", 3))
+
+# Runs LLM calls that can start before the current rerun has finished parsing its inputs
+background = ThreadPoolExecutor(max_workers=2)
+# Runs the per-chunk calls of oversized documents
+chunk_pool = ThreadPoolExecutor(max_workers=CHUNK_WORKERS)
+
+def run_in_background(func, *args, pool=background):
+    """Submits func to a pool (the background pool by default), keeping access to the current Streamlit session."""
+    ctx = get_script_run_ctx()
+    # Carries the rerun timer along, so background LLM calls show up in the timing panel
+    context = contextvars.copy_context()
+
+    def run():
+        add_script_run_ctx(ctx=ctx)
+        return context.run(func, *args)
+
+    return pool.submit(run)
+
+def iter_pdf_pages(file, serial_pages=QUESTION_PREFIX_PAGES):
+    """Yields the text of each page of a PDF file-like object as soon as it is parsed."""
+    yield from iter_pages(file.read(), serial_pages=serial_pages)
+
+def extract_text_and_prefix(file, prefix_pages=QUESTION_PREFIX_PAGES, on_prefix=None):
+    """Extracts the full text of a PDF and the text of its first prefix_pages pages.
+
+    on_prefix, if given, is called with the prefix text as soon as those pages are parsed,
+    so downstream work can start while the rest of the document is still being read.
+    """
+    start = time.perf_counter()
+    pages = []
+    prefix = None
+    for page_text in iter_pdf_pages(file, serial_pages=prefix_pages):
+        pages.append(page_text)
+        if prefix is None and len(pages) == prefix_pages:
+            prefix = "".join(pages)
+            if on_prefix:
+                on_prefix(prefix)
+
+    text = "".join(pages)
+    if prefix is None:
+        prefix = text
+        if on_prefix:
+            on_prefix(prefix)
+    metrics.PDF_EXTRACTION_SECONDS.observe(time.perf_counter() - start)
+    return text, prefix
+
 class RateLimiter:
+    # Every live limiter, for the queue depth metric
+    instances = weakref.WeakSet()
+
     def __init__(self, calls_per_minute):
+        self.set_rate(calls_per_minute)
+        self.last_call = 0
+        self.lock = threading.Lock()
+        # Totals for monitoring: calls let through and seconds spent waiting for a slot
+        self.calls = 0
+        self.total_wait = 0.0
+        RateLimiter.instances.add(self)
+
+    def set_rate(self, calls_per_minute):
+        """Change the allowed rate, e.g. to match the quota of a batch job"""
         self.calls_per_minute = calls_per_minute
         self.interval = 60 / calls_per_minute
-        self.last_call = 0
 
     def can_make_call(self):
         """Check if a call can be made based on the rate limit"""
@@ -41,17 +159,241 @@ class RateLimiter:
         time_since_last_call = now - self.last_call
         return time_since_last_call >= self.interval
 
+    def reserve(self):
+        """Reserve the next free call slot and return how long to wait for it.
+
+        Slots are handed out under a lock, so concurrent callers are spaced one
+        interval apart instead of all waking up at once. A slot beyond the current
+        deadline is not taken: DeadlineExceeded is raised instead.
+        """
+        left = remaining()
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.last_call + self.interval)
+            if left is not None and slot - now > left:
+                raise DeadlineExceeded("No rate limiter slot before the turn deadline")
+            self.last_call = slot
+            self.calls += 1
+            self.total_wait += slot - now
+        return slot - now
+
+    def try_reserve(self):
+        """Take a call slot only if one is free right now, for optional calls such as hedges"""
+        with self.lock:
+            now = time.time()
+            if now < self.last_call + self.interval:
+                return False
+            self.last_call = now
+            self.calls += 1
+            return True
+
+    def pending(self):
+        """Number of reserved slots that have not started yet (read without the lock)."""
+        ahead = self.last_call - time.time()
+        return int(ahead // self.interval) + 1 if ahead > 0 else 0
+
+    def acquire(self):
+        """Wait for the next free call slot"""
+        delay = self.reserve()
+        if delay > 0:
+            instrumentation.add_limiter_wait(delay)
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait for the next free call slot without blocking the event loop"""
+        delay = self.reserve()
+        if delay > 0:
+            instrumentation.add_limiter_wait(delay)
+            await asyncio.sleep(delay)
+
     def __call__(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.time()
-            time_since_last_call = now - self.last_call
-            if time_since_last_call < self.interval:
-                time.sleep(self.interval - time_since_last_call)
-            self.last_call = time.time()
+            self.acquire()
             return func(*args, **kwargs)
+        wrapper.limiter = self
         return wrapper
 
+metrics.LIMITER_QUEUE_DEPTH.set_function(lambda: sum(limiter.pending() for limiter in list(RateLimiter.instances)))
+
+# ==== Prompts ====
+def build_resume_prompt(resume_text, job_description=None):
+    """Builds the resume analysis prompt."""
+    prompt = f"""
+        Analyze the following resume content:
+        {resume_text}
+        
+        Evaluate the resume based on its relevance to the job description. Focus on technical skills, relevant experience, and qualifications.
+        """
+    
+    if job_description:
+        prompt += f"\nAdditionally, evaluate it in the context of the following job description:\n{job_description}"
+    return prompt
+
+def build_job_description_prompt(job_description_text):
+    """Builds the 5Ws and 1H job description analysis prompt."""
+    return f"""
+        Analyze the following job description using the 5Ws and 1H framework:
+        - Who is the ideal candidate for this role?
+        - What are the key responsibilities and qualifications?
+        - When and where will the role be performed?
+        - Why is this role important to the company?
+        - How should the candidate approach the tasks or challenges outlined in the description?
+
+        Additionally, if the company name is mentioned, provide a brief background on the company.
+
+        Job description:
+        {job_description_text}
+        """
+
+def build_question_prompt(job_description_text, resume_text, avoid=()):
+    """Builds the interview question generation prompt; avoid lists questions not to repeat."""
+    role_skills = skill_set(job_description_text)
+    candidate_skills = skill_set(resume_text)
+    prompt = f"""
+        You are an experienced HR interviewer. Generate a concise and relevant interview question based on the following job description and candidate's resume:
+        
+        Job Description: {job_description_text}
+        Candidate Resume: {resume_text}
+
+        Skills the role asks for that the candidate has: {format_skills(role_skills & candidate_skills)}
+        Skills the role asks for that the resume does not show: {format_skills(role_skills - candidate_skills)}
+
+        Ensure the question targets the candidate's skills or experience as mentioned in the job description. The interview question from simple to complex. 
+        The interview Generated Interview Questionuestion should not be too long. 
+        """
+    if avoid:
+        recent = list(dict.fromkeys(avoid))[-MAX_AVOIDED_QUESTIONS:]
+        asked = "\n".join(f"        - {question}" for question in recent)
+        prompt += f"""
+        Ask something different from these questions the candidate has already been asked:
+{asked}
+        """
+    return prompt
+
+def build_answer_prompt(query, question):
+    """Builds the prompt asking for feedback on an answer to question."""
+    return f"""
+        You are an experienced HR interviewer. The user's response to the interview question is below. 
+        "Evaluate the user's response based on relevance, clarity, technical accuracy, communication skills, and problem-solving skills. "
+        "If the response is irrelevant, unclear, or nonsensical, acknowledge that the response doesn't address the question and encourage the user to focus on the relevant aspects. "
+        "Provide tips or example better answer on how to answer the question effectively, such as asking for specific examples or encouraging the use of a structured response. "
+        "If the response is incorrect, provide a correct or theoretical answer and explain why the user's response was lacking or incorrect. "
+        "If the response is correct, suggest ways to improve the answer by elaborating on key points, adding more examples, or offering alternative ways to present the information more clearly."
+
+        Interview Question: {question}
+        User's Response: {query}
+        """
+
+def build_performance_prompt(responses):
+    """Builds the final interview report prompt."""
+    return f"""
+    As an HR interviewer, analyze the following interview responses and provide:
+    1. An overall score out of 100
+    2. A summary of strengths and weaknesses
+    3. Key areas for improvement
+    
+    Interview Responses:
+    {responses}
+    
+    Format the response as:
+    Score: [X]/100
+    
+    Overall Assessment:
+    [Summary paragraph]
+    
+    Strengths:
+    - [Point 1]
+    - [Point 2]
+    
+    Areas for Improvement:
+    - [Point 1]
+    - [Point 2]
+    
+    Recommendations:
+    - [Point 1]
+    - [Point 2]
+    """
+
+# Output budget of a document profile (its route's); a profile is a few hundred tokens of JSON
+PROFILE_MAX_TOKENS = route("profile")["max_output_tokens"]
+# Output budget per resume section when sections are extracted separately
+SECTION_PROFILE_TOKENS = 300
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@RateLimiter(calls_per_minute=5)
+def extract_profile(text, kind):
+    """Extracts the structured profile of a resume or job description, None if the reply is not usable"""
+    reply = generate_routed("profile", build_profile_prompt(text, kind))
+    return parse_profile(reply, text, kind)
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@RateLimiter(calls_per_minute=5)
+def extract_section_profiles(sections):
+    """Extracts the partial profiles of resume sections in one call: {section number: profile}"""
+    max_output_tokens = min(2 * PROFILE_MAX_TOKENS, SECTION_PROFILE_TOKENS * len(sections))
+    reply = generate_routed("profile", build_sections_profile_prompt(sections), max_output_tokens=max_output_tokens)
+    return parse_section_profiles(reply, len(sections))
+
+def extract_resume_profile(text):
+    """Resume profile merged from section profiles; only sections not seen before go to the model"""
+    sections = split_sections(text)
+    keys = [section_key(title, body, None) for title, body in sections]
+    store = get_session_store()
+    partials = store.load_profiles(keys)
+    missing = [i for i, key in enumerate(keys) if key not in partials and sections[i][1]]
+    if missing:
+        extracted = extract_section_profiles([sections[i] for i in missing])
+        for number, i in enumerate(missing, 1):
+            if number in extracted:
+                partials[keys[i]] = extracted[number]
+                store.save_profile(keys[i], "resume_section", extracted[number])
+    found = [partials[key] for key in keys if key in partials]
+    return merge_profiles(found, text) if found else None
+
+def extract_job_description_profile(text):
+    """Job description profile; an oversized one is extracted chunk by chunk in parallel and merged"""
+    if not needs_chunking(text):
+        return extract_profile(text, "job_description")
+    futures = [
+        run_in_background(extract_job_description_chunk_profile, chunk, pool=chunk_pool) for chunk in split_chunks(text)
+    ]
+    partials = [profile for profile in (future.result() for future in futures) if profile]
+    return merge_profiles(partials, text, "job_description") if partials else None
+
+def document_context(text, kind):
+    """What prompts see of a document: its profile, extracted once per document, or the text if that fails"""
+    key = document_hash(text)
+    if key not in st.session_state.profiles:
+        store = get_session_store()
+        profile = store.load_profile(key)
+        if profile is None:
+            try:
+                profile = extract_resume_profile(text) if kind == "resume" else extract_job_description_profile(text)
+            except Exception as e:
+                logger.warning("Profile extraction failed: %s", e)
+            if profile:
+                store.save_profile(key, kind, profile)
+        st.session_state.profiles[key] = profile_text(profile) if profile else None
+    return st.session_state.profiles[key] or text
+
+# Returned by analyze_resume when the model call fails
+RESUME_ANALYSIS_FAILED = "Could not analyze resume at this time. Please try again."
+
+# Returned by generate_interview_question when the model call fails
+QUESTION_GENERATION_FAILED = "Could not generate a question at this time. Please try again."
+
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -61,30 +403,46 @@ class RateLimiter:
 def analyze_resume(resume_text, job_description=None):
     """Analyzes resume content with AI, optionally including job description."""
     try:
-        prompt = f"""
-        Analyze the following resume content:
-        {resume_text}
-        
-        Evaluate the resume based on its relevance to the job description. Focus on technical skills, relevant experience, and qualifications.
-        """
-        
-        if job_description:
-            prompt += f"\nAdditionally, evaluate it in the context of the following job description:\n{job_description}"
-
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=2000,
-                temperature=0.5,
-            )
-        )
-        return response.text.strip()
+        return generate_routed("resume_analysis", build_resume_prompt(resume_text, job_description))
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
-        return "Could not analyze resume at this time. Please try again."
+        return RESUME_ANALYSIS_FAILED
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@RateLimiter(calls_per_minute=5)
+def analyze_resume_sections(sections, job_description=None):
+    """Analyzes resume sections in one call: {section number: analysis}"""
+    max_output_tokens = min(SECTION_ANALYSIS_MAX_TOKENS, TOKENS_PER_SECTION * len(sections))
+    reply = generate_routed(
+        "resume_analysis", build_section_prompt(sections, job_description), max_output_tokens=max_output_tokens
+    )
+    return parse_section_analyses(reply, len(sections))
+
+def analyze_resume_incrementally(resume_text, job_description=None):
+    """Resume analysis assembled per section; only sections not yet analyzed against this job go to the model"""
+    sections = split_sections(resume_text)
+    keys = [section_key(title, body, job_description) for title, body in sections]
+    store = get_session_store()
+    analyses = store.load_section_analyses(keys)
+    missing = [i for i, key in enumerate(keys) if key not in analyses and sections[i][1]]
+    if missing:
+        try:
+            found = analyze_resume_sections([sections[i] for i in missing], job_description)
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+            return RESUME_ANALYSIS_FAILED
+        for number, i in enumerate(missing, 1):
+            if number in found:
+                analyses[keys[i]] = found[number]
+                store.save_section_analysis(keys[i], found[number])
+    if not analyses:
+        return RESUME_ANALYSIS_FAILED
+    return merge_section_analyses(sections, [analyses.get(key) for key in keys], len(missing))
 
 # Add a caching mechanism
 class SimpleCache:
@@ -110,20 +468,68 @@ class SimpleCache:
 # Create global instances
 cache = SimpleCache()
 rate_limiter = RateLimiter(calls_per_minute=5)  # Reduced to 5 calls per minute
+# Shared by every call of a job description analysis, one-shot or chunked
+job_description_limiter = RateLimiter(calls_per_minute=5)
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@job_description_limiter
+def take_job_description_notes(chunk, number, total):
+    """Map step of a chunked analysis: short 5W1H notes on one part of a job description"""
+    prompt = build_chunk_notes_prompt(chunk, number, total)
+    return generate_routed("job_description_analysis", prompt, max_output_tokens=CHUNK_NOTES_TOKENS, temperature=0)
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@job_description_limiter
+def extract_job_description_chunk_profile(chunk):
+    """Partial profile of one chunk of an oversized job description, None if the reply is not usable"""
+    reply = generate_routed("profile", build_profile_prompt(chunk, "job_description"))
+    return parse_profile(reply, chunk, "job_description")
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    reraise=True
+)
+@job_description_limiter
+def merge_job_description_notes(notes):
+    """Reduce step of a chunked analysis: the 5W1H analysis written from the notes on every part"""
+    return generate_routed("job_description_analysis", build_merge_notes_prompt(notes))
+
+def analyze_job_description_in_chunks(job_description_text):
+    """Analyzes an oversized job description: its chunks in parallel, then one call merging their notes"""
+    chunks = split_chunks(job_description_text)
+    futures = [
+        run_in_background(take_job_description_notes, chunk, number, len(chunks), pool=chunk_pool)
+        for number, chunk in enumerate(chunks, 1)
+    ]
+    return merge_job_description_notes([future.result() for future in futures])
 
 # Update the analyze_job_description function with caching and rate limiting
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=2, min=4, max=10),
     reraise=True
 )
-@RateLimiter(calls_per_minute=5)
 def analyze_job_description(job_description_text):
     """Analyzes the job description using AI with 5Ws and 1H approach."""
     # Check cache first
     cached_result = cache.get('analyze_job_description', job_description_text)
     if cached_result:
+        instrumentation.mark_cache("hit")
         return cached_result
+    instrumentation.mark_cache("miss")
 
     # Check rate limit
     if not rate_limiter.can_make_call():
@@ -132,31 +538,12 @@ def analyze_job_description(job_description_text):
         return "Please wait a moment before analyzing the job description."
 
     try:
-        prompt = f"""
-        Analyze the following job description using the 5Ws and 1H framework:
-        - Who is the ideal candidate for this role?
-        - What are the key responsibilities and qualifications?
-        - When and where will the role be performed?
-        - Why is this role important to the company?
-        - How should the candidate approach the tasks or challenges outlined in the description?
-
-        Additionally, if the company name is mentioned, provide a brief background on the company.
-
-        Job description:
-        {job_description_text}
-        """
-        
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=2000,
-                temperature=0.5,
-            )
-        )
-        result = response.text.strip()
+        # Past the size threshold the document is analyzed map-reduce style instead of in one call
+        if needs_chunking(job_description_text):
+            result = analyze_job_description_in_chunks(job_description_text)
+        else:
+            job_description_limiter.acquire()
+            result = generate_routed("job_description_analysis", build_job_description_prompt(job_description_text))
         
         # Cache the result
         cache.set('analyze_job_description', result, job_description_text)
@@ -165,122 +552,99 @@ def analyze_job_description(job_description_text):
         st.error(f"An error occurred: {str(e)}")
         return "Could not analyze job description at this time. Please try again in a few moments."
 
-def extract_keywords(text):
-    """extract keywords from text"""
-    keywords = re.findall(r'\b\w+\b', text.lower())
-    return keywords
+# Hedged requests of these calls only take slots they have spare (see hedging.py)
+question_limiter = RateLimiter(calls_per_minute=5)
+answer_limiter = RateLimiter(calls_per_minute=5)
 
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     reraise=True
 )
-@RateLimiter(calls_per_minute=5)
-def generate_interview_question(job_description_text, resume_text):
+@question_limiter
+def generate_interview_question(job_description_text, resume_text, avoid=()):
     """Generate an interview question based on job description and resume"""
     try:
-        prompt = f"""
-        You are an experienced HR interviewer. Generate a concise and relevant interview question based on the following job description and candidate's resume:
-        
-        Job Description: {job_description_text}
-        Candidate Resume: {resume_text}
-
-        Ensure the question targets the candidate's skills or experience as mentioned in the job description. The interview question from simple to complex. 
-        The interview Generated Interview Questionuestion should not be too long. 
-        """
-        
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=150,
-                temperature=0.5,
-            )
-        )
-        return response.text.strip()
+        prompt = build_question_prompt(job_description_text, resume_text, avoid)
+        return generate_hedged("question", prompt, question_limiter)
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
-        return "Could not generate a question at this time. Please try again."
+        return QUESTION_GENERATION_FAILED
 
 # ====Response to User Answer====
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
+    # Past the turn deadline there is no time left to retry in
+    retry=retry_if_not_exception_type(DeadlineExceeded),
     reraise=True
 )
-@RateLimiter(calls_per_minute=5)
-def analyze_answer(query, context):
-    """Generate feedback based on user's response to the interview question"""
-    try:
-        prompt = f"""
-        You are an experienced HR interviewer. The user's response to the interview question is below. 
-        "Evaluate the user's response based on relevance, clarity, technical accuracy, communication skills, and problem-solving skills. "
-        "If the response is irrelevant, unclear, or nonsensical, acknowledge that the response doesn't address the question and encourage the user to focus on the relevant aspects. "
-        "Provide tips or example better answer on how to answer the question effectively, such as asking for specific examples or encouraging the use of a structured response. "
-        "If the response is incorrect, provide a correct or theoretical answer and explain why the user's response was lacking or incorrect. "
-        "If the response is correct, suggest ways to improve the answer by elaborating on key points, adding more examples, or offering alternative ways to present the information more clearly."
-
-        Interview Question: {context[-2]['content']}
-        User's Response: {query}
-        """
+@answer_limiter
+def analyze_answer(query, question):
+    """Generate feedback based on user's response to the interview question
 
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=1000,
-                temperature=0.5,
-            )
-        )
-        return response.text.strip()
+    Raises DeadlineExceeded once the turn deadline has passed.
+    """
+    try:
+        return generate_hedged("answer_feedback", build_answer_prompt(query, question), answer_limiter)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         return "I apologize, but I'm currently experiencing high traffic. Please try again in a few moments."
 
+def is_repeat(seen, question, source):
+    """Whether question is a near duplicate of one the candidate was already asked"""
+    earlier = seen.find(question) if seen is not None else None
+    if earlier is not None:
+        metrics.QUESTION_REPEATS.labels(source).inc()
+        logger.debug("Skipping %s question close to an earlier one", source)
+    return earlier is not None
+
+def next_interview_question(job_description_text, resume_text, asked=(), seen=None):
+    """Serves a banked question for this role and candidate; generates and banks one on a miss.
+
+    Questions close to one in seen (the candidate's SketchIndex) are passed over or regenerated.
+    """
+    bank = get_question_bank()
+    difficulty = question_difficulty(len(asked), QUESTIONS_PER_INTERVIEW)
+    avoid = list(asked)
+    question = None
+    for _ in range(QUESTION_ATTEMPTS):
+        question = bank.find(job_description_text, resume_text, difficulty, exclude=avoid)
+        if question is None or not is_repeat(seen, question, "bank"):
+            break
+        avoid.append(question)
+        question = None
+    attempt = 0
+    while question is None:
+        attempt += 1
+        question = generate_interview_question(job_description_text, resume_text, tuple(avoid))
+        if question == QUESTION_GENERATION_FAILED:
+            return question
+        # The last attempt is kept even if it repeats: a question beats no question
+        if attempt < QUESTION_ATTEMPTS and is_repeat(seen, question, "generated"):
+            avoid.append(question)
+            question = None
+            continue
+        bank.add(question, job_description_text, resume_text, difficulty)
+    if seen is not None:
+        remember(get_session_store(), seen, question)
+    return question
+
+def format_interview_summary(user_responses):
+    """Formats the recorded question/answer/feedback turns for the final report"""
+    return "\n\n".join([
+        f"Question: {resp['question']}\nAnswer: {resp['answer']}\nFeedback: {resp['feedback']}"
+        for resp in user_responses
+    ])
+
+@instrumentation.llm_call
 def analyze_interview_performance(responses):
     """Analyzes overall interview performance and provides a summary with score"""
-    prompt = f"""
-    As an HR interviewer, analyze the following interview responses and provide:
-    1. An overall score out of 100
-    2. A summary of strengths and weaknesses
-    3. Key areas for improvement
-    
-    Interview Responses:
-    {responses}
-    
-    Format the response as:
-    Score: [X]/100
-    
-    Overall Assessment:
-    [Summary paragraph]
-    
-    Strengths:
-    - [Point 1]
-    - [Point 2]
-    
-    Areas for Improvement:
-    - [Point 1]
-    - [Point 2]
-    
-    Recommendations:
-    - [Point 1]
-    - [Point 2]
-    """
-    
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            candidate_count=1,
-            max_output_tokens=1000,
-            temperature=0.5,
-        )
-    )
-    return response.text.strip()
+    return generate_routed("report", build_performance_prompt(responses))
 
 def reset_all_states():
     # List of ALL session state keys to reset, including file uploads
@@ -294,7 +658,15 @@ def reset_all_states():
         'resume_file',
         'job_description_file',
         'resume_uploader',  # Clear file uploader state
-        'jd_uploader'      # Clear file uploader state
+        'jd_uploader',     # Clear file uploader state
+        'question_counter',
+        'session_id',
+        'resume_text',
+        'resume_prefix',
+        'job_description_text',
+        'job_description_prefix',
+        'resume_analysis',
+        'job_description_analysis',
     ]
     
     # Reset each key
@@ -302,6 +674,76 @@ def reset_all_states():
         if key in st.session_state:
             del st.session_state[key]
 
+    # Drop the stored session from the URL so the next run starts a new one
+    st.query_params.clear()
+
+@st.cache_resource
+def get_session_store():
+    """One durable session store per server process"""
+    return SessionStore()
+
+@st.cache_resource
+def get_question_bank():
+    """One question bank per server process"""
+    return QuestionBank()
+
+def restore_session():
+    """Binds this browser session to a stored interview, restoring it after a reconnect or restart.
+
+    The session id travels in the page URL (?session=...), so reopening the link
+    brings back the conversation and documents without repeating any LLM call.
+    """
+    store = get_session_store()
+    session_id = st.query_params.get("session")
+    if session_id and st.session_state.get("session_id") == session_id:
+        return
+
+    saved = store.load(session_id) if session_id else None
+    if saved is None:
+        session_id = store.create()
+        st.query_params["session"] = session_id
+    else:
+        st.session_state.messages = [
+            {"role": "assistant", "content": "Ask me anything to start your interview practice!"}
+        ] + saved["messages"]
+        st.session_state.user_responses = saved["user_responses"]
+        for key in ("current_question", "question_counter", "interview_completed",
+                    "resume_text", "resume_prefix", "job_description_text", "job_description_prefix",
+                    "resume_analysis", "job_description_analysis"):
+            st.session_state[key] = saved[key]
+    st.session_state.session_id = session_id
+
+def save_session(**fields):
+    """Updates session state fields and persists them"""
+    for key, value in fields.items():
+        st.session_state[key] = value
+    get_session_store().save_fields(st.session_state.session_id, **fields)
+
+def add_message(role, content):
+    """Appends a chat message and persists it"""
+    st.session_state.messages.append({"role": role, "content": content})
+    get_session_store().append_turn(st.session_state.session_id, "message", {"role": role, "content": content})
+
+def add_response(question, answer, feedback, score=None):
+    """Records an answered question and persists it"""
+    response = {"question": question, "answer": answer, "feedback": feedback, "score": score}
+    st.session_state.user_responses.append(response)
+    get_session_store().append_turn(st.session_state.session_id, "response", response)
+    metrics.TURNS.inc()
+
+def asked_questions():
+    """Questions already answered in this interview"""
+    return [response["question"] for response in st.session_state.user_responses]
+
+def candidate_questions(resume_text):
+    """Sketches of every question asked to this candidate, in this and earlier interviews"""
+    candidate = document_hash(resume_text)
+    seen = st.session_state.asked_questions
+    if seen is None or seen.key != candidate:
+        seen = load_history(get_session_store(), candidate)
+        st.session_state.asked_questions = seen
+    return seen
+
 def set_theme():
     """Sets theme CSS with improved visibility for both modes"""
     css = """
@@ -428,7 +870,7 @@ def make_api_call():
         return None
     # Make your API call here
 
-def main():
+def interview_page():
     st.set_page_config(page_title="Interviewer ChatBot AI (Interviewer Mode)", page_icon="🤖", layout="wide")
     set_theme()
     
@@ -497,7 +939,8 @@ def main():
         st.session_state.current_question = None
 
     if "asked_questions" not in st.session_state:
-        st.session_state.asked_questions = set()
+        # SketchIndex of the candidate's earlier questions, loaded with the resume
+        st.session_state.asked_questions = None
 
     if "questions_asked" not in st.session_state:
         st.session_state.questions_asked = 0
@@ -509,6 +952,17 @@ def main():
     if "interview_completed" not in st.session_state:
         st.session_state.interview_completed = False
 
+    if "question_counter" not in st.session_state:
+        st.session_state.question_counter = 0
+
+    # Document hash -> profile text, so reruns do not go back to the store
+    if "profiles" not in st.session_state:
+        st.session_state.profiles = {}
+
+    # Resume a stored interview if the URL carries a session id
+    with stage("restore_session"):
+        restore_session()
+
     # Store the uploaded files in session state
     if resume_file is not None:
         st.session_state.resume_file = resume_file
@@ -517,36 +971,79 @@ def main():
 
     resume_text = ""
     job_description_text = ""
+    # Leading pages of each document, used for question generation
+    resume_prefix = ""
+    job_description_prefix = ""
+    question_future = None
+
+    def start_first_question(prefix):
+        # Generate the opening question from the document prefixes while the rest is parsed
+        nonlocal question_future
+        if resume_prefix and not st.session_state.current_question:
+            question_future = run_in_background(
+                next_interview_question, prefix, resume_prefix, asked_questions(), candidate_questions(resume_text)
+            )
 
     # Process uploaded files
-    if resume_file:
-        resume_text = extract_text_from_pdf(resume_file)
-        st.success("Resume uploaded and extracted successfully!")
-    elif 'resume_file' in st.session_state:
-        # Seek to beginning of file before reading
-        st.session_state.resume_file.seek(0)
-        resume_text = extract_text_from_pdf(st.session_state.resume_file)
-
-    if job_description_file:
-        job_description_text = extract_text_from_pdf(job_description_file)
-        st.success("Job description uploaded and extracted successfully!")
-    elif 'job_description_file' in st.session_state:
-        # Seek to beginning of file before reading
-        st.session_state.job_description_file.seek(0)
-        job_description_text = extract_text_from_pdf(st.session_state.job_description_file)
-
-    # Print the extracted text to verify
-    print("Job Description Text: ", job_description_text[:1000])  # Debug output
-
-    # Ensure both files are uploaded
-    if not resume_file or not job_description_file:
+    with stage("extract_resume"):
+        if resume_file:
+            resume_text, resume_prefix = extract_text_and_prefix(resume_file)
+            st.success("Resume uploaded and extracted successfully!")
+        elif 'resume_file' in st.session_state:
+            # Seek to beginning of file before reading
+            st.session_state.resume_file.seek(0)
+            resume_text, resume_prefix = extract_text_and_prefix(st.session_state.resume_file)
+        elif st.session_state.get("resume_text"):
+            # Restored session: the document was stored when it was first uploaded
+            resume_text = st.session_state.resume_text
+            resume_prefix = st.session_state.resume_prefix
+
+    with stage("extract_job_description"):
+        if job_description_file:
+            job_description_text, job_description_prefix = extract_text_and_prefix(
+                job_description_file, on_prefix=start_first_question
+            )
+            st.success("Job description uploaded and extracted successfully!")
+        elif 'job_description_file' in st.session_state:
+            # Seek to beginning of file before reading
+            st.session_state.job_description_file.seek(0)
+            job_description_text, job_description_prefix = extract_text_and_prefix(
+                st.session_state.job_description_file, on_prefix=start_first_question
+            )
+        elif st.session_state.get("job_description_text"):
+            job_description_text = st.session_state.job_description_text
+            job_description_prefix = st.session_state.job_description_prefix
+
+    # Persist newly uploaded documents; their old analyses no longer apply
+    if resume_text and resume_text != st.session_state.get("resume_text"):
+        save_session(resume_text=resume_text, resume_prefix=resume_prefix, resume_analysis=None)
+    if job_description_text and job_description_text != st.session_state.get("job_description_text"):
+        logger.debug("New job description: %d characters", len(job_description_text))
+        save_session(job_description_text=job_description_text, job_description_prefix=job_description_prefix,
+                     resume_analysis=None, job_description_analysis=None)
+
+    # Ensure both files are uploaded (or restored with the session)
+    if not (resume_file or resume_text) or not (job_description_file or job_description_text):
         st.warning("Please upload both your resume and job description.")
         return
 
+    # Prompts get the documents' structured profiles instead of their full text
+    resume_context = job_description_context = ""
+    if resume_text and job_description_text:
+        with stage("profiles"):
+            resume_future = run_in_background(document_context, resume_text, "resume")
+            job_description_context = document_context(job_description_text, "job_description")
+            resume_context = resume_future.result()
+
     # === Resume Analysis ===
     if resume_text:
         st.subheader("Resume Analysis")
-        resume_feedback = analyze_resume(resume_text, job_description_text)
+        with stage("analyze_resume"):
+            resume_feedback = st.session_state.get("resume_analysis")
+            if not resume_feedback:
+                resume_feedback = analyze_resume_incrementally(resume_text, job_description_context)
+                if resume_feedback != RESUME_ANALYSIS_FAILED:
+                    save_session(resume_analysis=resume_feedback)
         st.markdown(resume_feedback)
     else:
         st.warning("No text found in the resume PDF.")
@@ -554,54 +1051,75 @@ def main():
     # === Job Description Analysis ===
     if job_description_text:
         st.subheader("Job Description Analysis")
-        jd_feedback = analyze_job_description(job_description_text)
+        with stage("analyze_job_description"):
+            jd_feedback = st.session_state.get("job_description_analysis")
+            if not jd_feedback:
+                # An oversized document is analyzed from its full text, chunk by chunk; the profile would drop most of it
+                if needs_chunking(job_description_text):
+                    jd_feedback = analyze_job_description(job_description_text)
+                else:
+                    jd_feedback = analyze_job_description(job_description_context or job_description_text)
+                if not jd_feedback.startswith(("Could not", "Please wait")):
+                    save_session(job_description_analysis=jd_feedback)
         st.markdown(jd_feedback)
     else:
         st.warning("No text found in the job description PDF.")
 
     # Generate initial question if both files are present
     if resume_text and job_description_text and not st.session_state.current_question:
-        question = generate_interview_question(job_description_text, resume_text)
-        st.session_state.current_question = question
-        st.session_state.messages.append({"role": "assistant", "content": question})
+        with stage("first_question"):
+            if question_future is not None:
+                question = question_future.result()
+            else:
+                question = next_interview_question(
+                    job_description_context, resume_context, asked_questions(), candidate_questions(resume_text)
+                )
+        save_session(current_question=question)
+        add_message("assistant", question)
 
     # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-    # Add counter to session state if not exists
-    if "question_counter" not in st.session_state:
-        st.session_state.question_counter = 0
+    with stage("render_history"):
+        for message in st.session_state.messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
 
     # Continuous question handling
     def llm_function(query):
-        context = st.session_state.messages
-        
         try:
-            # Generate feedback for the user's response
-            feedback = analyze_answer(query, context)
-            st.session_state.messages.append({"role": "user", "content": query})
-            st.session_state.messages.append({"role": "assistant", "content": feedback})
-            st.session_state.user_responses.append({"question": context[-2]['content'], "answer": query, "feedback": feedback})
+            # Generate feedback for the user's response; empty, trivial, junk or very weak answers
+            # get local coaching, everything else goes to the model
+            question = st.session_state.current_question
+            score, features = score_answer(query, question, job_description_text)
+            feedback = canned_feedback(query, question)
+            if feedback is None and not needs_llm_review(score):
+                feedback = local_feedback(score, features)
+            if feedback is None:
+                # The model gets the turn budget; past it the candidate gets the local feedback instead
+                try:
+                    with deadline(TURN_BUDGET_SECONDS):
+                        feedback = analyze_answer(query, question)
+                except DeadlineExceeded:
+                    logger.info("Answer feedback missed the %.0fs turn budget", TURN_BUDGET_SECONDS)
+                    feedback = local_feedback(score, features)
+            add_message("user", query)
+            add_message("assistant", feedback)
+            add_response(question, query, feedback, score)
             
             with st.chat_message("assistant"):
+                st.caption(f"Answer score: {score:.0f}/100")
                 st.markdown(feedback)
             
             # Increment question counter
-            st.session_state.question_counter += 1
+            save_session(question_counter=st.session_state.question_counter + 1)
             
-            # Check if we've reached 5 questions
-            if st.session_state.question_counter >= 5:
-                st.session_state.interview_completed = True
+            # Check if we've reached the last question
+            if st.session_state.question_counter >= QUESTIONS_PER_INTERVIEW:
                 # Format responses for analysis
-                interview_summary = "\n\n".join([
-                    f"Question: {resp['question']}\nAnswer: {resp['answer']}\nFeedback: {resp['feedback']}"
-                    for resp in st.session_state.user_responses
-                ])
+                interview_summary = format_interview_summary(st.session_state.user_responses)
                 # Get final performance analysis
                 final_score = analyze_interview_performance(interview_summary)
-                st.session_state.messages.append({"role": "assistant", "content": f"Interview Complete!\n\n{final_score}"})
+                save_session(interview_completed=True, report=final_score)
+                add_message("assistant", f"Interview Complete!\n\n{final_score}")
                 with st.chat_message("assistant"):
                     st.markdown(f"Interview Complete!\n\n{final_score}")
                 return
@@ -610,9 +1128,11 @@ def main():
             time.sleep(2)
             
             # Generate next question
-            question = generate_interview_question(job_description_text, resume_text)
-            st.session_state.current_question = question
-            st.session_state.messages.append({"role": "assistant", "content": st.session_state.current_question})
+            question = next_interview_question(
+                job_description_context, resume_context, asked_questions(), candidate_questions(resume_text)
+            )
+            save_session(current_question=question)
+            add_message("assistant", question)
             
             with st.chat_message("assistant"):
                 st.markdown(st.session_state.current_question)
@@ -625,7 +1145,8 @@ def main():
         if query:
             with st.chat_message("user"):
                 st.markdown(query)
-            llm_function(query)
+            with stage("answer_turn"):
+                llm_function(query)
     else:
         # Display a disabled input box with a message
         st.text_input(
@@ -633,6 +1154,105 @@ def main():
             value="Interview session has ended. Click 'Reset Interview' to start a new session.",
             disabled=True
         )
+    render_progress()
+
+def render_progress():
+    """Sidebar progress: questions answered and the running local answer score"""
+    scores = [r["score"] for r in st.session_state.user_responses if r.get("score") is not None]
+    if not scores:
+        return
+    answered = min(st.session_state.question_counter, QUESTIONS_PER_INTERVIEW)
+    st.sidebar.progress(
+        answered / QUESTIONS_PER_INTERVIEW,
+        text=f"Question {answered}/{QUESTIONS_PER_INTERVIEW} · average answer score {sum(scores) / len(scores):.0f}/100",
+    )
+
+def start_profiler():
+    """Starts a profiler for this rerun: pyinstrument if installed, cProfile otherwise"""
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    profiler = Profiler()
+    profiler.start()
+    return profiler
+
+def stop_profiler(profiler):
+    """Stops the profiler and returns its report as text"""
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(40)
+        return output.getvalue()
+    profiler.stop()
+    return profiler.output_text(unicode=True, color=False)
+
+def request_profile():
+    st.session_state.profile_next_rerun = True
+
+def render_timing_panel(summary):
+    """Sidebar panel with the timing of the last rerun and the opt-in controls"""
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("⏱ Performance", expanded=False):
+            st.toggle("Time each rerun", key="timing_panel")
+            st.button("Profile next rerun", on_click=request_profile, use_container_width=True)
+            if summary:
+                st.markdown(f"**Rerun total:** {summary['total']:.3f}s "
+                            f"(outside stages: {summary['unstaged']:.3f}s)")
+                if summary["stages"]:
+                    st.table(summary["stages"])
+                if summary["llm_calls"]:
+                    st.markdown("**LLM calls** (seconds)")
+                    st.table([
+                        {key: call[key] for key in ("function", "limiter_wait", "network", "other", "total", "attempts")}
+                        for call in summary["llm_calls"]
+                    ])
+            if st.session_state.get("last_profile"):
+                st.download_button("Download last profile", st.session_state.last_profile,
+                                   file_name="rerun_profile.txt", use_container_width=True)
+                st.code(st.session_state.last_profile[:5000])
+
+def active_session_count():
+    """Number of browser sessions connected to this Streamlit server, or None if Streamlit no longer exposes it."""
+    from streamlit import runtime
+    if not runtime.exists():
+        return 0
+    # Streamlit has no public API for this; a release that changes the internals only drops the gauge
+    try:
+        return runtime.get_instance()._session_mgr.num_active_sessions()
+    except Exception:
+        return None
+
+metrics.ACTIVE_SESSIONS.set_function(active_session_count)
+
+def session_state_bytes(state):
+    """Approximate size of the text a session holds: documents, analyses and the conversation."""
+    size = sum(len(value) for value in state.values() if isinstance(value, str))
+    size += sum(len(message["content"]) for message in state.get("messages", []))
+    size += sum(
+        len(value) for response in state.get("user_responses", []) for value in response.values()
+        if isinstance(value, str)
+    )
+    return size
+
+def main():
+    metrics.start_server()
+    profile = st.session_state.pop("profile_next_rerun", False)
+    timer = None
+    if st.session_state.get("timing_panel") or profile:
+        timer = instrumentation.start_rerun()
+    profiler = start_profiler() if profile else None
+    try:
+        interview_page()
+    finally:
+        if profiler:
+            st.session_state.last_profile = stop_profiler(profiler)
+        summary = instrumentation.finish_rerun(timer) if timer else None
+        metrics.SESSION_STATE_BYTES.observe(session_state_bytes(st.session_state))
+    render_timing_panel(summary)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,248 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import google.generativeai as genai
+import instrumentation
+import metrics
+import routing
+from hedging import call_timeout, deadline_errors, latencies
+from output_budget import budget
+
+# Model used for every call unless a caller asks for another one
+MODEL_NAME = "gemini-1.5-flash"
+
+# Builds the model client; tools such as the load test swap in an offline fake
+model_factory = genai.GenerativeModel
+
+# Rough size of a token, for replies that come without usage metadata
+CHARS_PER_TOKEN = 4
+
+# Runs both requests of a hedged call from synchronous code
+hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def generation_config(max_output_tokens, temperature=0.5):
+    """Builds the generation settings shared by all calls."""
+    return genai.types.GenerationConfig(
+        candidate_count=1,
+        max_output_tokens=max_output_tokens,
+        temperature=temperature,
+    )
+
+
+def request_options(timeout):
+    """Per-request options: the timeout in seconds, if any."""
+    return {"timeout": timeout} if timeout else None
+
+
+def is_truncated(response):
+    """Whether the reply stopped at max_output_tokens (finish reason MAX_TOKENS)."""
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    return getattr(reason, "name", reason) == "MAX_TOKENS"
+
+
+def record_output(response, text, max_output_tokens, adaptive_route):
+    """Notes a truncated reply, and feeds the reply's length to its route's adaptive cap."""
+    truncated = is_truncated(response)
+    if truncated:
+        instrumentation.mark_truncated()
+    if adaptive_route:
+        usage = getattr(response, "usage_metadata", None)
+        output_tokens = getattr(usage, "candidates_token_count", 0) or len(text) // CHARS_PER_TOKEN
+        budget.observe(adaptive_route, output_tokens, max_output_tokens, truncated)
+
+
+def generate(prompt, max_output_tokens, temperature=0.5, model_name=MODEL_NAME, timeout=None, adaptive_route=None):
+    """Sends a prompt to Gemini and returns the response text.
+
+    adaptive_route names the route whose adaptive cap max_output_tokens came from, to learn from this reply.
+    """
+    model = model_factory(model_name)
+    start = time.perf_counter()
+    try:
+        response = model.generate_content(
+            prompt,
+            generation_config=generation_config(max_output_tokens, temperature),
+            request_options=request_options(timeout),
+        )
+    except Exception as e:
+        instrumentation.mark_failed(e)
+        raise
+    finally:
+        instrumentation.add_network_time(time.perf_counter() - start)
+    instrumentation.add_usage(model_name, response)
+    text = response.text.strip()
+    record_output(response, text, max_output_tokens, adaptive_route)
+    return text
+
+
+async def generate_async(
+    prompt, max_output_tokens, temperature=0.5, model_name=MODEL_NAME, timeout=None, adaptive_route=None
+):
+    """Async version of generate, for callers running on an event loop."""
+    model = model_factory(model_name)
+    start = time.perf_counter()
+    try:
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=generation_config(max_output_tokens, temperature),
+            request_options=request_options(timeout),
+        )
+    except Exception as e:
+        instrumentation.mark_failed(e)
+        raise
+    finally:
+        instrumentation.add_network_time(time.perf_counter() - start)
+    instrumentation.add_usage(model_name, response)
+    text = response.text.strip()
+    record_output(response, text, max_output_tokens, adaptive_route)
+    return text
+
+
+async def stream_async(
+    prompt, max_output_tokens, temperature=0.5, model_name=MODEL_NAME, timeout=None, adaptive_route=None
+):
+    """Yields chunks of the response text as Gemini produces them."""
+    model = model_factory(model_name)
+    start = time.perf_counter()
+    first_token = None
+    chunks = []
+    try:
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=generation_config(max_output_tokens, temperature),
+            request_options=request_options(timeout),
+            stream=True,
+        )
+        async for chunk in response:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+    except Exception as e:
+        instrumentation.mark_failed(e)
+        raise
+    finally:
+        instrumentation.add_network_time(time.perf_counter() - start, ttft=first_token)
+    # Token counts and the finish reason arrive with the final chunk
+    instrumentation.add_usage(model_name, response)
+    record_output(response, "".join(chunks), max_output_tokens, adaptive_route)
+
+
+def routed_arguments(task, overrides):
+    settings = routing.route(task, **overrides)
+    # A cap given by the caller is used as is; otherwise the route's cap adapts to its observed replies
+    adaptive = "max_output_tokens" not in overrides
+    if adaptive:
+        settings["max_output_tokens"] = budget.cap(task, settings["max_output_tokens"])
+    instrumentation.set_route(task, settings["max_output_tokens"])
+    return {
+        "max_output_tokens": settings["max_output_tokens"],
+        "temperature": settings["temperature"],
+        "model_name": settings["model"],
+        # Never wait past the deadline of the current turn
+        "timeout": call_timeout(settings["timeout"]),
+        "adaptive_route": task if adaptive else None,
+    }
+
+
+def generate_routed(task, prompt, **overrides):
+    """Sends a prompt with the model, token cap, temperature and timeout routed to task (see routing.py)."""
+    arguments = routed_arguments(task, overrides)
+    start = time.perf_counter()
+    with deadline_errors():
+        text = generate(prompt, **arguments)
+    latencies.observe(task, time.perf_counter() - start)
+    return text
+
+
+async def generate_routed_async(task, prompt, **overrides):
+    """Async version of generate_routed."""
+    arguments = routed_arguments(task, overrides)
+    start = time.perf_counter()
+    with deadline_errors():
+        # Enforced here too, so a stalled connection cannot outlive the deadline
+        text = await asyncio.wait_for(generate_async(prompt, **arguments), arguments["timeout"])
+    latencies.observe(task, time.perf_counter() - start)
+    return text
+
+
+async def stream_routed_async(task, prompt, **overrides):
+    """Streaming version of generate_routed."""
+    async for chunk in stream_async(prompt, **routed_arguments(task, overrides)):
+        yield chunk
+
+
+def hedge_delay(task):
+    """Seconds after which a call of task may be hedged, or None if the route is not hedged (yet)."""
+    return latencies.hedge_delay(task) if routing.route(task)["hedge"] else None
+
+
+def recorded_request(record, task, prompt, overrides):
+    with instrumentation.request_record(record):
+        return generate_routed(task, prompt, **overrides)
+
+
+def submit_request(task, prompt, overrides):
+    """Starts one request of a hedged call on hedge_pool: (future, the record of its usage)."""
+    record = instrumentation.new_record(None)
+    context = contextvars.copy_context()
+    return hedge_pool.submit(context.run, recorded_request, record, task, prompt, overrides), record
+
+
+def generate_hedged(task, prompt, limiter, **overrides):
+    """generate_routed, plus an identical second request if the first is slower than the route's p95
+    and limiter has a free slot right now. The first reply wins; the other request is abandoned.
+    """
+    delay = hedge_delay(task)
+    if delay is None:
+        return generate_routed(task, prompt, **overrides)
+    primary, record = submit_request(task, prompt, overrides)
+    requests = {primary: record}
+    hedge = None
+    if not wait([primary], timeout=delay).done and limiter.try_reserve():
+        instrumentation.mark_hedged()
+        hedge, record = submit_request(task, prompt, overrides)
+        requests[hedge] = record
+
+    winner, pending = None, set(requests)
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = next((future for future in done if future.exception() is None), None)
+    for future, record in requests.items():
+        if future.done():
+            instrumentation.add_request(record)
+        elif not future.cancel():
+            # A thread cannot be stopped: the request finishes unread, and is recorded on its own
+            future.add_done_callback(lambda _, record=record: instrumentation.finish_late_request(record))
+    if hedge is not None and winner is not None:
+        metrics.LLM_HEDGES.labels(task, "hedge" if winner is hedge else "primary").inc()
+    return (winner or primary).result()
+
+
+async def generate_hedged_async(task, prompt, limiter, **overrides):
+    """Async version of generate_hedged; the losing request is cancelled."""
+    delay = hedge_delay(task)
+    if delay is None:
+        return await generate_routed_async(task, prompt, **overrides)
+    primary = asyncio.ensure_future(generate_routed_async(task, prompt, **overrides))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not limiter.try_reserve():
+        return await primary
+    instrumentation.mark_hedged()
+    hedge = asyncio.ensure_future(generate_routed_async(task, prompt, **overrides))
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    metrics.LLM_HEDGES.labels(task, "hedge" if future is hedge else "primary").inc()
+                    return future.result()
+        return primary.result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,288 @@
+"""Prometheus-style metrics for the running app.
+
+Counters, gauges and histograms live in one process-wide registry, and are served in
+the Prometheus text format from a small HTTP server (start_server) or any web
+framework route (render).
+
+Updates are cheap and lock-free: every thread writes to its own slot of each metric,
+and a scrape sums the slots. A thread takes a lock once, the first time it touches a
+metric; slots of finished threads are then folded into a running total, as they are
+at scrape time, so short-lived threads (one per Streamlit rerun) do not pile up.
+
+    METRICS_PORT   port of the /metrics server (default 9464, 0 disables it)
+    METRICS_HOST   interface to bind (default 127.0.0.1)
+"""
+import abc
+import bisect
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9464))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+logger = logging.getLogger("interviewer.metrics")
+
+# Every metric family, in registration order
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+
+
+class ThreadSlots:
+    """Per-thread arrays of floats: writers only touch their own thread's array."""
+
+    def __init__(self, size):
+        self.size = size
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.slots = []   # [(thread, values)]
+        self.retired = [0.0] * size
+
+    def mine(self):
+        values = getattr(self.local, "values", None)
+        if values is None:
+            values = self.local.values = [0.0] * self.size
+            with self.lock:
+                self.fold()
+                self.slots.append((threading.current_thread(), values))
+        return values
+
+    def fold(self):
+        """Moves the slots of finished threads into the retired total; called with the lock held."""
+        alive = []
+        for thread, values in self.slots:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                # The thread can no longer write, so its values are final
+                self.retired = [a + b for a, b in zip(self.retired, values)]
+        self.slots = alive
+
+    def totals(self):
+        with self.lock:
+            self.fold()
+            alive = list(self.slots)
+            totals = list(self.retired)
+        for _, values in alive:
+            totals = [a + b for a, b in zip(totals, values)]
+        return totals
+
+
+class CounterValue(ThreadSlots):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1):
+        self.mine()[0] += amount
+
+    def dec(self, amount=1):
+        self.mine()[0] -= amount
+
+
+class HistogramValue(ThreadSlots):
+    def __init__(self, buckets):
+        # One count per bucket plus +Inf, then the sum
+        super().__init__(len(buckets) + 2)
+        self.buckets = buckets
+
+    def observe(self, value):
+        values = self.mine()
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+
+class Metric(abc.ABC):
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        if not self.labelnames:
+            # Unlabeled metrics report 0 before their first update
+            self.labels()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """Returns the child for these label values, e.g. LLM_CALLS.labels("analyze_answer", "ok").inc()."""
+        values = tuple(str(value) for value in values)
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self.children.setdefault(values, self.new_child())
+        return child
+
+    def new_child(self):
+        return CounterValue()
+
+    def label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+    @abc.abstractmethod
+    def samples(self):
+        """Yields (suffix, label text, value) for every child."""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in list(self.children.items()):
+            yield "_total", self.label_text(values), child.totals()[0]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is read from a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = None
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set_function(self, function):
+        """Reports function() on every scrape instead of the inc/dec total; None leaves the gauge out."""
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                logger.warning("Gauge %s failed: %s", self.name, e)
+                return
+            if value is not None:
+                yield "", "", value
+            return
+        for values, child in list(self.children.items()):
+            yield "", self.label_text(values), child.totals()[0]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def new_child(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in list(self.children.items()):
+            totals = child.totals()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), totals):
+                cumulative += count
+                yield "_bucket", self.label_text(values, [("le", format_value(bound))]), cumulative
+            yield "_count", self.label_text(values), cumulative
+            yield "_sum", self.label_text(values), totals[-1]
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render():
+    """Returns every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ==== App metrics ====
+ACTIVE_SESSIONS = Gauge("interviewer_active_sessions", "Interview sessions currently connected")
+TURNS = Counter("interviewer_turns", "Answered interview questions")
+LLM_IN_FLIGHT = Gauge("interviewer_llm_calls_in_flight", "LLM-calling functions currently running")
+LLM_CALLS = Counter("interviewer_llm_calls", "Finished LLM-calling functions", ("function", "status"))
+LLM_CALL_SECONDS = Histogram("interviewer_llm_call_seconds", "Duration of LLM-calling functions, including retries", ("function",))
+LLM_ROUTE_SECONDS = Histogram("interviewer_llm_route_seconds", "Duration of routed LLM calls", ("route", "model"))
+LLM_COST = Counter("interviewer_llm_cost_usd", "Estimated model cost of routed LLM calls in USD", ("route", "model"))
+LLM_TRUNCATED = Counter("interviewer_llm_truncated", "Model replies cut off at max_output_tokens", ("route",))
+LLM_HEDGES = Counter("interviewer_llm_hedges", "Hedged model calls by the request that answered first", ("route", "winner"))
+LLM_REQUESTS = Counter("interviewer_llm_requests", "Requests sent to the model, one per attempt")
+LLM_RATE_LIMITED = Counter("interviewer_llm_rate_limited", "Model requests rejected with HTTP 429")
+LIMITER_QUEUE_DEPTH = Gauge("interviewer_limiter_queue_depth", "Calls holding a rate limiter slot that has not started yet")
+ANSWER_VERDICTS = Counter("interviewer_answer_verdicts", "Answers by local pre-filter verdict; only \"ok\" goes to the model", ("verdict",))
+CACHE_LOOKUPS = Counter("interviewer_cache_lookups", "Analysis cache lookups", ("outcome",))
+QUESTION_BANK_LOOKUPS = Counter("interviewer_question_bank_lookups", "Question bank lookups; a miss generates a question", ("outcome",))
+QUESTION_REPEATS = Counter("interviewer_question_repeats", "Questions passed over as near duplicates of earlier ones", ("source",))
+PRACTICE_QUESTIONS = Counter("interviewer_practice_questions", "Practice questions served, by source: review, bank or generated", ("source",))
+PDF_EXTRACTION_SECONDS = Histogram("interviewer_pdf_extraction_seconds", "Time to extract the text of one PDF")
+LOG_RECORDS_DROPPED = Counter("interviewer_log_records_dropped", "Log records dropped because the log queue was full")
+SESSION_STATE_BYTES = Histogram(
+    "interviewer_session_state_bytes", "Size of the text held in session state, per rerun or turn", buckets=SIZE_BUCKETS
+)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_server(port=None, host=None):
+    """Serves /metrics from a daemon thread; safe to call on every rerun. Returns the server or None."""
+    global _server, _server_failed
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer((host or METRICS_HOST, port), MetricsHandler)
+            except OSError as e:
+                # Typically another app process already serves this port
+                logger.warning("Metrics server not started on port %s: %s", port, e)
+                _server_failed = True
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
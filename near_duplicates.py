@@ -0,0 +1,109 @@
+"""Near-duplicate interview question detection with MinHash sketches.
+
+A question is reduced to character shingles of its content words and summarized by
+a MinHash signature of NUM_PERM 32-bit values (384 bytes), whatever its length. The
+share of equal values between two signatures estimates the Jaccard similarity of
+their shingle sets, so "How do you handle missing data in a dataset?" and "How would
+you handle missing values in your dataset?" compare as close.
+
+Signatures are cut into BANDS bands for locality-sensitive hashing: similar
+questions almost surely share a band, so a lookup is BANDS dictionary probes plus a
+check of the few questions found there, however many a candidate has been asked.
+The per-candidate history is stored as signatures in the session store.
+"""
+import os
+import zlib
+
+import numpy as np
+
+from answer_filter import STOPWORDS
+from text_utils import extract_keywords
+
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_CHARS = 4
+
+# Estimated Jaccard similarity from which a question counts as a repeat
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.5))
+
+# Question phrasing that says nothing about what is asked
+FILLER = frozenset("""
+tell describe explain walk us me give share talk example examples please think ve ll d s re
+""".split())
+
+PRIME = (1 << 31) - 1
+_random = np.random.RandomState(20240521)
+# Fixed seed: signatures are stored and compared across restarts
+_A = _random.randint(1, PRIME, NUM_PERM).astype(np.uint64)
+_B = _random.randint(0, PRIME, NUM_PERM).astype(np.uint64)
+
+
+def shingles(text):
+    """Character shingles of the question's content words."""
+    words = " ".join(word for word in extract_keywords(text) if word not in STOPWORDS and word not in FILLER)
+    if len(words) <= SHINGLE_CHARS:
+        return {words}
+    return {words[i:i + SHINGLE_CHARS] for i in range(len(words) - SHINGLE_CHARS + 1)}
+
+
+def signature(text):
+    """MinHash signature of text: NUM_PERM uint32 values."""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class SketchIndex:
+    """The questions one candidate has been asked, as MinHash signatures in LSH buckets."""
+
+    def __init__(self, key=None):
+        self.key = key
+        self.questions = []
+        self.signatures = []
+        self.buckets = {}   # (band, band values) -> positions in questions
+
+    def __len__(self):
+        return len(self.questions)
+
+    def bands(self, sig):
+        return [(band, sig[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+    def add(self, question, sig=None):
+        """Adds a question (with its signature if already known) and returns the signature."""
+        sig = signature(question) if sig is None else sig
+        position = len(self.questions)
+        self.questions.append(question)
+        self.signatures.append(sig)
+        for bucket in self.bands(sig):
+            self.buckets.setdefault(bucket, []).append(position)
+        return sig
+
+    def find(self, question, threshold=NEAR_DUPLICATE_THRESHOLD):
+        """Returns the earlier question closest to this one if it is a near duplicate, else None."""
+        sig = signature(question)
+        candidates = {position for bucket in self.bands(sig) for position in self.buckets.get(bucket, ())}
+        best, best_similarity = None, threshold
+        for position in candidates:
+            score = similarity(sig, self.signatures[position])
+            if score >= best_similarity:
+                best, best_similarity = self.questions[position], score
+        return best
+
+
+def load_history(store, candidate):
+    """SketchIndex of the questions the session store has recorded for a candidate."""
+    index = SketchIndex(candidate)
+    for question, sig in store.question_history(candidate):
+        index.add(question, np.frombuffer(sig, dtype=np.uint32))
+    return index
+
+
+def remember(store, index, question):
+    """Adds an asked question to the candidate's index and the stored history."""
+    sig = index.add(question)
+    store.record_question(index.key, question, sig.tobytes())
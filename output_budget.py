@@ -0,0 +1,60 @@
+"""Adaptive max_output_tokens per model route, from the output lengths actually seen.
+
+Every routed reply is recorded with its output token count. Once a route has
+MIN_SAMPLES replies, its cap becomes the PERCENTILE of the recent lengths plus
+HEADROOM, instead of the fixed guess in routing.py: a task whose replies are short
+no longer leaves room for a long, slow one, and a task that needs more gets it.
+
+A reply cut off at the cap (finish reason MAX_TOKENS) only shows that the task
+needed more than the cap, so it is recorded as TRUNCATION_GROWTH times the cap;
+a few of those raise the percentile, and with it the cap. Caps never go above
+CEILING times the configured one, nor below MIN_CAP.
+
+    ADAPTIVE_OUTPUT_TOKENS   set to 0 to always use the configured caps
+"""
+import math
+import os
+import threading
+from collections import deque
+
+from stats import percentile
+
+ENABLED = os.environ.get("ADAPTIVE_OUTPUT_TOKENS", "1") != "0"
+
+# Recent replies kept per route, and how many are needed before adapting
+WINDOW = 200
+MIN_SAMPLES = 20
+PERCENTILE = 0.95
+HEADROOM = 1.25
+TRUNCATION_GROWTH = 1.5
+MIN_CAP = 64
+CEILING = 2
+
+
+class OutputBudget:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.samples = {}   # route -> deque of output token counts
+
+    def observe(self, task, output_tokens, cap, truncated):
+        """Records one reply of a route: its output length, and whether it hit the cap."""
+        value = cap * TRUNCATION_GROWTH if truncated else output_tokens
+        with self.lock:
+            self.samples.setdefault(task, deque(maxlen=WINDOW)).append(value)
+
+    def cap(self, task, configured):
+        """The output cap to use for the next call of a route whose configured cap is configured."""
+        with self.lock:
+            samples = list(self.samples.get(task, ()))
+        if not self.enabled or len(samples) < MIN_SAMPLES:
+            return configured
+        wanted = math.ceil(percentile(samples, PERCENTILE) * HEADROOM)
+        return min(configured * CEILING, max(MIN_CAP, wanted))
+
+    def caps(self, configured):
+        """{route: current cap} for the routes in configured ({route: configured cap})."""
+        return {task: self.cap(task, cap) for task, cap in configured.items()}
+
+
+budget = OutputBudget()
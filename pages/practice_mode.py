@@ -2,7 +2,17 @@ import google.generativeai as genai
 import os
 import streamlit as st
 from dotenv import load_dotenv
-import fitz  # PyMuPDF
+from pdf_extraction import extract_text_from_bytes
+from answer_scoring import score_answer
+from llm import generate_routed
+from practice_history import PracticeHistory, question_skill, skill_difficulty
+from question_bank import QuestionBank
+from skills import skill_set
+from text_utils import document_hash
+import app_logging
+import instrumentation
+import logging
+import metrics
 import re
 import time
 from functools import wraps
@@ -13,6 +23,9 @@ load_dotenv()
 
 genai.configure(api_key=os.environ["GEMINI_API_KEY"])
 
+app_logging.configure()
+logger = logging.getLogger("interviewer.practice")
+
 class RateLimiter:
     def __init__(self, calls_per_minute):
         self.calls_per_minute = calls_per_minute
@@ -36,15 +49,12 @@ rate_limiter = RateLimiter(calls_per_minute=3)  # Reduced to 3 calls per minute
 
 def extract_text_from_pdf(file):
     """Extracts text from a PDF file-like object uploaded via Streamlit."""
-    text = ""
-    with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-
-    # Print the extracted text to debug
-    print("Extracted Text: ", text[:1000])  # Only print the first 1000 characters for debugging
+    text = extract_text_from_bytes(file.read())
+    # Sizes only: document text never goes to the logs
+    logger.debug("Extracted %d characters from PDF", len(text))
     return text
 
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -64,17 +74,7 @@ def analyze_resume(resume_text, job_description=None):
         if job_description:
             prompt += f"\nAdditionally, evaluate it in the context of the following job description:\n{job_description}"
 
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=2000,
-                temperature=0.5,
-            )
-        )
-        return response.text.strip()
+        return generate_routed("resume_analysis", prompt)
     except Exception as e:
         error_msg = str(e)
         if "429" in error_msg:
@@ -84,6 +84,7 @@ def analyze_resume(resume_text, job_description=None):
         st.error(f"An error occurred: {error_msg}")
         return "Could not analyze resume at this time. Please try again."
 
+@instrumentation.llm_call
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -106,26 +107,15 @@ def analyze_job_description(job_description_text):
     {job_description_text}
     """
     
-    model = genai.GenerativeModel("gemini-1.5-flash")
-
-    # Debugging: print the prompt to ensure it's being created correctly
-    print("Job Description Analysis Prompt: ", prompt[:1000])
-    
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            candidate_count=1,
-            max_output_tokens=2000,
-            temperature=0.5,
-        )
-    )
-    return response.text.strip()
+    logger.debug("Job description analysis prompt: %d characters", len(prompt))
+    return generate_routed("job_description_analysis", prompt)
 
 def extract_keywords(text):
     """提取文本中的关键词（使用简单的词频分析或正则表达式）"""
     keywords = re.findall(r'\b\w+\b', text.lower())
     return keywords
 
+@instrumentation.llm_call
 def generate_interview_question(job_description_text, resume_text):
     """Generate an interview question based on job description and resume"""
     prompt = f"""
@@ -138,19 +128,50 @@ def generate_interview_question(job_description_text, resume_text):
     The interview Generated Interview Questionuestion should not be too long. 
     """
     
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            candidate_count=1,
-            max_output_tokens=150,
-            temperature=0.5,
-        )
+    return generate_routed("question", prompt)
+
+@st.cache_resource
+def get_practice_history():
+    """One practice history store per server process"""
+    return PracticeHistory()
+
+@st.cache_resource
+def get_question_bank():
+    """One question bank per server process"""
+    return QuestionBank()
+
+def next_practice_question(job_description_text, resume_text):
+    """Picks the next question from the candidate's reviews and weak skills; generates one only if none fits"""
+    candidate = document_hash(resume_text)
+    history = get_practice_history()
+    bank = get_question_bank()
+    question, skill = history.next_question(
+        candidate, bank, job_description_text, resume_text, exclude=[st.session_state.current_question]
+    )
+    if question is None:
+        question = generate_interview_question(job_description_text, resume_text)
+        skill = question_skill(question, skill_set(job_description_text))
+        bank.add(question, job_description_text, resume_text, skill_difficulty(history.skill_scores(candidate).get(skill)))
+        metrics.PRACTICE_QUESTIONS.labels("generated").inc()
+    st.session_state.current_question = question
+    st.session_state.current_skill = skill
+    return question
+
+def render_practice_focus(resume_text):
+    """Sidebar summary of the candidate's weakest skills and the reviews due"""
+    history = get_practice_history()
+    candidate = document_hash(resume_text)
+    scores = history.skill_scores(candidate)
+    if not scores:
+        return
+    weakest = sorted(scores, key=scores.get)[:3]
+    lines = [f"- {skill}: {scores[skill]:.0f}/100" for skill in weakest]
+    st.sidebar.markdown(
+        "**Practice focus**\n" + "\n".join(lines) + f"\n\nQuestions due for review: {len(history.due(candidate))}"
     )
-    return response.text.strip()
 
 # ====Response to User Answer====
+@instrumentation.llm_call
 def analyze_answer(query, context):
     """Generate feedback based on user's response to the interview question"""
     try:
@@ -161,22 +182,13 @@ def analyze_answer(query, context):
         "Provide tips or example better answer on how to answer the question effectively, such as asking for specific examples or encouraging the use of a structured response. "
         "If the response is incorrect, provide a correct or theoretical answer and explain why the user's response was lacking or incorrect. "
         "If the response is correct, suggest ways to improve the answer by elaborating on key points, adding more examples, or offering alternative ways to present the information more clearly."
+        "End with one line rating the response: Score: <0-100>/100"
 
         Interview Question: {context[-2]['content']}
         User's Response: {query}
         """
 
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=1000,
-                temperature=0.5,
-            )
-        )
-        return response.text.strip()
+        return generate_routed("answer_feedback", prompt)
     except Exception as e:
         error_message = f"An error occurred: {str(e)}"
         if "429" in str(e):
@@ -366,9 +378,6 @@ def main():
         job_description_text = extract_text_from_pdf(job_description_file)
         st.success("Job description uploaded and extracted successfully!")
 
-    # Print the extracted text to verify
-    print("Job Description Text: ", job_description_text[:1000])  # Debug output
-
     # Ensure both files are uploaded
     if not resume_file or not job_description_file:
         st.warning("Please upload both your resume and job description.")
@@ -384,7 +393,7 @@ def main():
                     st.markdown(resume_feedback)
             except Exception as e:
                 st.error("Failed to analyze resume. Please try again in a moment.")
-                print(f"Error analyzing resume: {str(e)}")
+                logger.warning("Error analyzing resume: %s", e)
 
     # === Job Description Analysis ===
     if job_description_text:
@@ -396,13 +405,13 @@ def main():
                     st.markdown(jd_feedback)
             except Exception as e:
                 st.error("Failed to analyze job description. Please try again in a moment.")
-                print(f"Error analyzing job description: {str(e)}")
+                logger.warning("Error analyzing job description: %s", e)
 
     # Generate an initial interview question if it's the first round
     if resume_text and job_description_text and not st.session_state.current_question:
-        question = generate_interview_question(job_description_text, resume_text)
-        st.session_state.current_question = question
+        question = next_practice_question(job_description_text, resume_text)
         st.session_state.messages.append({"role": "assistant", "content": question})
+    render_practice_focus(resume_text)
 
     # Display chat history
     for message in st.session_state.messages:
@@ -414,18 +423,23 @@ def main():
         try:
             context = st.session_state.messages
 
-            # Generate feedback for the user's response
+            # Score the answer locally; the model is only asked for feedback
+            question = st.session_state.current_question
+            score, _ = score_answer(query, question, job_description_text)
             feedback = analyze_answer(query, context)
             st.session_state.messages.append({"role": "user", "content": query})
             st.session_state.messages.append({"role": "assistant", "content": feedback})
 
             with st.chat_message("assistant"):
+                st.caption(f"Answer score: {score:.0f}/100")
                 st.markdown(feedback)
 
-            # Only generate new question if previous response was successful
+            # Only move on to a new question if previous response was successful
             if "error" not in feedback.lower():
-                question = generate_interview_question(job_description_text, resume_text)
-                st.session_state.current_question = question
+                get_practice_history().record(
+                    document_hash(resume_text), question, query, score, feedback, st.session_state.get("current_skill")
+                )
+                next_practice_question(job_description_text, resume_text)
                 st.session_state.messages.append({"role": "assistant", "content": st.session_state.current_question})
 
                 with st.chat_message("assistant"):
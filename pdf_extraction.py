@@ -0,0 +1,126 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz  # PyMuPDF
+
+# Documents with fewer pages than this are parsed serially in the calling thread.
+# Below the crossover the cost of handing the document to worker processes is larger
+# than the parsing time saved; run benchmarks/bench_pdf_extraction.py on the target
+# machine to re-measure it and override with PDF_PARALLEL_PAGE_THRESHOLD.
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PDF_PARALLEL_PAGE_THRESHOLD", 16))
+
+# Number of worker processes used for large documents
+MAX_WORKERS = int(os.environ.get("PDF_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+
+_pool = None
+
+
+def _get_pool():
+    """Returns the shared worker pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        # spawn instead of fork: the Streamlit server is multi-threaded
+        _pool = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _extract_page_range(data, start, stop):
+    """Worker entry point: opens the document from bytes and returns the text of pages [start, stop)."""
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [doc[number].get_text() for number in range(start, stop)]
+
+
+def page_ranges(page_count, chunks):
+    """Splits page numbers 0..page_count into at most `chunks` contiguous (start, stop) ranges."""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for index in range(chunks):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_pages_serial(data):
+    """Returns the text of every page, parsed in the calling thread."""
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [page.get_text() for page in doc]
+
+
+def extract_pages_parallel(data, page_count, workers=None, first_page=0):
+    """Returns the text of pages first_page..page_count, with page ranges parsed across the worker pool."""
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_page_range, data, first_page + start, first_page + stop)
+        for start, stop in page_ranges(page_count - first_page, workers or MAX_WORKERS)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def extract_pages(data, parallel_threshold=None):
+    """Returns a list with the text of each page, picking serial or parallel parsing by page count."""
+    global _pool
+    if parallel_threshold is None:
+        parallel_threshold = PARALLEL_PAGE_THRESHOLD
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if MAX_WORKERS < 2 or page_count < parallel_threshold:
+            return [page.get_text() for page in doc]
+
+    try:
+        return extract_pages_parallel(data, page_count)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OS); drop the pool and parse serially
+        _pool = None
+        return extract_pages_serial(data)
+
+
+def extract_text_from_bytes(data, parallel_threshold=None):
+    """Extracts the full text of a PDF given as bytes."""
+    return "".join(extract_pages(data, parallel_threshold))
+
+
+def iter_pages(data, serial_pages=0, parallel_threshold=None):
+    """Yields the text of each page in order as soon as it is available.
+
+    The first `serial_pages` pages are parsed one by one in the calling thread so a
+    consumer can act on them immediately; the remainder is handed to extract_pages,
+    which uses the worker pool when it is large enough.
+    """
+    if parallel_threshold is None:
+        parallel_threshold = PARALLEL_PAGE_THRESHOLD
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        remainder = page_count - serial_pages
+        if MAX_WORKERS < 2 or remainder < parallel_threshold:
+            for page in doc:
+                yield page.get_text()
+            return
+        for number in range(serial_pages):
+            yield doc[number].get_text()
+
+    try:
+        rest = extract_pages_parallel(data, page_count, MAX_WORKERS, first_page=serial_pages)
+    except BrokenProcessPool:
+        global _pool
+        _pool = None
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            rest = [doc[number].get_text() for number in range(serial_pages, page_count)]
+    yield from rest
+
+
+def extract_file_text(path):
+    """Worker entry point for batch jobs: returns the full text of a PDF on disk, parsed serially."""
+    with open(path, "rb") as file:
+        return "".join(extract_pages_serial(file.read()))
@@ -0,0 +1,228 @@
+"""Practice history per candidate, with spaced-repetition scheduling.
+
+Every practice answer is stored with its score and the model's feedback. Each
+question the candidate has practiced is a review item scheduled SM-2 style: a weak
+answer brings the question back within minutes, a strong one pushes it out by days,
+further each time it is answered well.
+
+An answer is judged by the score the model gives in its feedback ("Score: N/100").
+When the feedback has none, the local score (answer_scoring) is used instead, against
+its own, lower pass mark: the local score of a solid but brief answer is around 30,
+of a full STAR answer with results around 75.
+
+The next practice question is, in order:
+    a review item that is due, weakest last score first
+    a new banked question on the candidate's weakest skill for the role
+    a banked question for the role and the candidate (QuestionBank.find)
+and only when all of these come up empty does the caller generate one.
+
+Candidates are keyed by a hash of their resume text, so the history survives Clear
+Chat and later visits with the same resume.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import metrics
+from answer_scoring import REPORT_SCORE
+from question_bank import DIFFICULTIES
+from skills import skill_set
+
+logger = logging.getLogger("interviewer.practice_history")
+
+DEFAULT_PATH = os.environ.get("PRACTICE_DB_PATH", "practice_history.db")
+
+DAY = 24 * 60 * 60
+# Answers the model scores below this are relearned: the question comes back after RELEARN_SECONDS
+PASSING_SCORE = 60
+# The pass mark on the local score, for feedback without a model score
+LOCAL_PASSING_SCORE = float(os.environ.get("PRACTICE_LOCAL_PASSING_SCORE", 40))
+RELEARN_SECONDS = 10 * 60
+# SM-2 starting ease and its floor
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# Skills the candidate has not practiced yet rank as if they had scored this
+UNPRACTICED_SCORE = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS practice_items (
+    candidate TEXT NOT NULL,
+    question TEXT NOT NULL,
+    skill TEXT,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    repetitions INTEGER NOT NULL,
+    due_at REAL NOT NULL,
+    last_score REAL NOT NULL,
+    PRIMARY KEY (candidate, question)
+);
+CREATE INDEX IF NOT EXISTS practice_items_due ON practice_items (candidate, due_at);
+CREATE TABLE IF NOT EXISTS practice_attempts (
+    attempt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    score REAL,
+    feedback TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS practice_attempts_by_candidate ON practice_attempts (candidate, attempt_id);
+"""
+
+
+def feedback_score(feedback):
+    """The score the model gave in its feedback, or None if it gave none."""
+    match = REPORT_SCORE.search(feedback or "")
+    return min(100.0, float(match.group(1))) if match else None
+
+
+def answer_score(local_score, feedback):
+    """(score, pass mark) an answer is judged by: the model's score if it gave one, else the local one."""
+    score = feedback_score(feedback)
+    if score is None:
+        return local_score, LOCAL_PASSING_SCORE
+    return score, PASSING_SCORE
+
+
+def schedule(item, score, now, passing=PASSING_SCORE):
+    """SM-2 update of an item (dict) after an answer scoring 0-100, passing from passing up."""
+    # SM-2 quality 0-5, with the pass mark at 3
+    if score < passing:
+        quality = 3 * score / passing
+    else:
+        quality = 3 + 2 * (score - passing) / (100 - passing)
+    if score < passing:
+        item["repetitions"] = 0
+        item["interval"] = RELEARN_SECONDS
+    else:
+        item["repetitions"] += 1
+        if item["repetitions"] == 1:
+            item["interval"] = DAY
+        elif item["repetitions"] == 2:
+            item["interval"] = 6 * DAY
+        else:
+            item["interval"] *= item["ease"]
+    item["ease"] = max(MIN_EASE, item["ease"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    item["due_at"] = now + item["interval"]
+    item["last_score"] = score
+    return item
+
+
+def skill_difficulty(score):
+    """Harder questions as a skill gets stronger; easy for a skill not practiced yet."""
+    if score is None:
+        return DIFFICULTIES[0]
+    return DIFFICULTIES[min(int(score / 100 * len(DIFFICULTIES)), len(DIFFICULTIES) - 1)]
+
+
+def question_skill(question, role_skills=frozenset()):
+    """The skill a question is filed under: one the role asks for if it names one."""
+    skills = skill_set(question)
+    return min(skills & role_skills or skills, default=None)
+
+
+class PracticeHistory:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.items = {}   # candidate -> {question: item}, loaded on first use
+        with closing(self.connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def candidate_items(self, candidate):
+        with self.lock:
+            if candidate not in self.items:
+                connection = self.connect()
+                try:
+                    connection.row_factory = sqlite3.Row
+                    rows = connection.execute(
+                        "SELECT * FROM practice_items WHERE candidate = ?", (candidate,)
+                    ).fetchall()
+                finally:
+                    connection.close()
+                self.items[candidate] = {row["question"]: dict(row) for row in rows}
+            return self.items[candidate]
+
+    def record(self, candidate, question, answer, score, feedback, skill=None):
+        """Stores an answer and reschedules its question; score is the answer's local score."""
+        now = time.time()
+        score, passing = answer_score(score, feedback)
+        items = self.candidate_items(candidate)
+        item = items.get(question) or {
+            "candidate": candidate, "question": question, "skill": skill,
+            "ease": INITIAL_EASE, "interval": 0.0, "repetitions": 0, "due_at": now, "last_score": 0.0,
+        }
+        schedule(item, score, now, passing)
+        items[question] = item
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO practice_attempts (candidate, question, answer, score, feedback, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (candidate, question, answer, score, feedback, now),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO practice_items"
+                    " (candidate, question, skill, ease, interval, repetitions, due_at, last_score)"
+                    " VALUES (:candidate, :question, :skill, :ease, :interval, :repetitions, :due_at, :last_score)",
+                    item,
+                )
+        except sqlite3.Error as e:
+            logger.error("Practice history write failed: %s", e)
+        finally:
+            connection.close()
+        return item
+
+    def skill_scores(self, candidate):
+        """{skill: average last score} over the candidate's practiced questions."""
+        totals = {}
+        for item in self.candidate_items(candidate).values():
+            if item["skill"]:
+                total = totals.setdefault(item["skill"], [0.0, 0])
+                total[0] += item["last_score"]
+                total[1] += 1
+        return {skill: total / count for skill, (total, count) in totals.items()}
+
+    def weak_skills(self, candidate, role_skills):
+        """The role's skills, weakest first; practiced skills outside the role follow."""
+        scores = self.skill_scores(candidate)
+        ranked = sorted(role_skills, key=lambda skill: (scores.get(skill, UNPRACTICED_SCORE), skill))
+        return ranked + sorted((skill for skill in scores if skill not in role_skills), key=scores.get)
+
+    def due(self, candidate, now=None):
+        """Items due for review, weakest last score first."""
+        now = now or time.time()
+        items = [item for item in self.candidate_items(candidate).values() if item["due_at"] <= now]
+        return sorted(items, key=lambda item: (item["last_score"], item["due_at"]))
+
+    def next_question(self, candidate, bank, job_description_text, resume_text, exclude=()):
+        """Returns (question, skill) to practice next, or (None, None) when one has to be generated."""
+        items = self.candidate_items(candidate)
+        for item in self.due(candidate):
+            if item["question"] not in exclude:
+                metrics.PRACTICE_QUESTIONS.labels("review").inc()
+                return item["question"], item["skill"]
+
+        role_skills = skill_set(job_description_text)
+        scores = self.skill_scores(candidate)
+        seen = list(items) + list(exclude)
+        for skill in self.weak_skills(candidate, role_skills):
+            question = bank.pick(skill, skill_difficulty(scores.get(skill)), exclude=seen)
+            if question:
+                metrics.PRACTICE_QUESTIONS.labels("bank").inc()
+                return question, skill
+
+        question = bank.find(job_description_text, resume_text, DIFFICULTIES[0], exclude=seen)
+        if question:
+            metrics.PRACTICE_QUESTIONS.labels("bank").inc()
+            return question, question_skill(question, role_skills)
+        return None, None
@@ -0,0 +1,208 @@
+"""Offline bulk generation of question pools for the question bank.
+
+Usage:
+    python pregenerate_questions.py --job-descriptions jds/ --per-combo 5 --window 22-7
+
+Enumerates (role, skill, difficulty) combinations: every position the practice pages
+offer, with general questions, plus each skill found in the job descriptions of
+stored sessions (and of --job-descriptions PDFs) under the role that description is
+for. Combinations whose skill appears in more job descriptions go first.
+
+Several combinations are asked for in one prompt, and calls are spaced by their own
+rate limiter (--calls-per-minute) and only made inside the --window hours, so the
+job stays out of the way of live interviews. Questions go into the bank as each
+batch arrives. Re-running skips combinations the bank already has enough questions
+for, so an interrupted job picks up where it stopped.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+import instrumentation
+from llm import generate_routed
+from pdf_extraction import extract_file_text
+from question_bank import DIFFICULTIES, ROLES, QuestionBank, infer_role, is_reusable
+from skills import skill_set
+from interviewer_mode import RateLimiter
+
+# Output tokens allowed per requested question, and the cap for one batch
+TOKENS_PER_QUESTION = 60
+MAX_BATCH_TOKENS = 8192
+
+
+def stored_job_descriptions(db_path):
+    """Job description texts of stored interview sessions."""
+    if not os.path.exists(db_path):
+        return []
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT DISTINCT job_description_text FROM sessions WHERE job_description_text IS NOT NULL"
+        ).fetchall()
+    finally:
+        connection.close()
+    return [text for (text,) in rows if text.strip()]
+
+
+def folder_job_descriptions(folder):
+    """Texts of the PDF job descriptions in folder."""
+    texts = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(".pdf"):
+            try:
+                texts.append(extract_file_text(os.path.join(folder, name)))
+            except Exception as e:
+                print(f"skipping {name}: {e}", file=sys.stderr)
+    return texts
+
+
+def enumerate_combos(job_descriptions):
+    """Returns (role, skill, difficulty) combinations, the most requested skills first."""
+    demand = Counter()
+    for text in job_descriptions:
+        role = infer_role(text)
+        for skill in skill_set(text):
+            demand[role, skill] += 1
+    combos = [(role, None, difficulty) for role in ROLES for difficulty in DIFFICULTIES]
+    for (role, skill), _ in demand.most_common():
+        combos.extend((role, skill, difficulty) for difficulty in DIFFICULTIES)
+    return combos
+
+
+def build_batch_prompt(combos, per_combo):
+    """Builds one prompt asking for per_combo questions for each combination."""
+    requests = "\n".join(
+        f"        {number}. role: {role or 'any'}; skill: {skill or 'general, no specific skill'}; difficulty: {difficulty}"
+        for number, (role, skill, difficulty) in enumerate(combos, 1)
+    )
+    return f"""
+        You are an experienced HR interviewer building a bank of interview questions.
+        For each numbered request below, write {per_combo} distinct, concise interview questions for that role,
+        about that skill, at that difficulty. Easy questions check basic knowledge or experience, medium ones
+        ask how the candidate applies it, hard ones probe design decisions, trade-offs or difficult situations.
+        The questions must not refer to any particular candidate, company or resume.
+
+        Reply with JSON only: a list with one object per request, like {{"id": 1, "questions": ["...", "..."]}}.
+
+{requests}
+        """
+
+
+def parse_batch(text, combos):
+    """Returns {combo: [questions]} from the model's reply, ignoring anything malformed."""
+    start, end = text.find("["), text.rfind("]")
+    try:
+        items = json.loads(text[start:end + 1]) if start >= 0 else []
+    except json.JSONDecodeError:
+        return {}
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("questions"), list):
+            continue
+        number = item.get("id")
+        if isinstance(number, int) and 1 <= number <= len(combos):
+            results[combos[number - 1]] = [q.strip() for q in item["questions"] if isinstance(q, str)]
+    return results
+
+
+@instrumentation.llm_call
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=60),
+    reraise=True
+)
+@RateLimiter(calls_per_minute=2)
+def generate_question_batch(prompt, max_output_tokens):
+    """Generates one batch of bank questions"""
+    return generate_routed("question_batch", prompt, max_output_tokens=max_output_tokens)
+
+
+def parse_window(window):
+    """Parses "22-7" into (22, 7) local hours; "any" means no restriction."""
+    if window == "any":
+        return None
+    start, end = (int(hour) for hour in window.split("-"))
+    return start % 24, end % 24
+
+
+def in_window(hours, now=None):
+    if hours is None:
+        return True
+    start, end = hours
+    hour = (now or datetime.now()).hour
+    return start <= hour < end if start < end else hour >= start or hour < end
+
+
+def wait_for_window(hours):
+    if not in_window(hours):
+        print(f"outside the {hours[0]}:00-{hours[1]}:00 window, waiting", file=sys.stderr)
+        while not in_window(hours):
+            time.sleep(60)
+
+
+def run(bank, combos, per_combo, batch_size, hours, max_calls=None):
+    """Fills the bank up to per_combo questions for each combination."""
+    pending = [combo for combo in combos if bank.count(*combo) < per_combo]
+    print(f"{len(combos) - len(pending)} of {len(combos)} combinations already filled, "
+          f"{len(pending)} to go", file=sys.stderr)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    added_total = 0
+    started = time.time()
+    for number, batch in enumerate(batches[:max_calls], 1):
+        wait_for_window(hours)
+        max_output_tokens = min(MAX_BATCH_TOKENS, TOKENS_PER_QUESTION * per_combo * len(batch))
+        try:
+            reply = generate_question_batch(build_batch_prompt(batch, per_combo), max_output_tokens)
+        except Exception as e:
+            print(f"[{number}/{len(batches)}] failed: {e}", file=sys.stderr)
+            continue
+        questions = [
+            (question, role, difficulty, {skill} if skill else skill_set(question))
+            for (role, skill, difficulty), generated in parse_batch(reply, batch).items()
+            for question in generated[:per_combo]
+            if is_reusable(question)
+        ]
+        added = bank.add_many(questions, source="batch")
+        added_total += added
+        elapsed = time.time() - started
+        remaining = (len(batches) - number) * elapsed / number
+        print(f"[{number}/{len(batches)}] {added} new questions ({added_total} total), "
+              f"about {remaining / 60:.0f} min left", file=sys.stderr)
+    return added_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate interview questions into the question bank.")
+    parser.add_argument("--db", default=os.environ.get("SESSION_DB_PATH", "interview_sessions.db"),
+                        help="Session store whose job descriptions supply skills")
+    parser.add_argument("--job-descriptions", help="Folder of additional job description PDFs")
+    parser.add_argument("--bank", help="Question bank database (default: QUESTION_BANK_PATH)")
+    parser.add_argument("--per-combo", type=int, default=5, help="Questions wanted per role, skill and difficulty")
+    parser.add_argument("--batch-size", type=int, default=8, help="Combinations asked for in one prompt")
+    parser.add_argument("--calls-per-minute", type=float, default=2, help="Gemini request budget for this job")
+    parser.add_argument("--window", default="22-7",
+                        help="Local hours the job may call Gemini in, e.g. 22-7; 'any' for no restriction")
+    parser.add_argument("--max-calls", type=int, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    job_descriptions = stored_job_descriptions(args.db)
+    if args.job_descriptions:
+        job_descriptions += folder_job_descriptions(args.job_descriptions)
+    combos = enumerate_combos(job_descriptions)
+    print(f"{len(job_descriptions)} job descriptions, {len(combos)} combinations", file=sys.stderr)
+
+    generate_question_batch.limiter.set_rate(args.calls_per_minute)
+    bank = QuestionBank(args.bank) if args.bank else QuestionBank()
+    added = run(bank, combos, args.per_combo, args.batch_size, parse_window(args.window), args.max_calls)
+    print(f"{added} questions added to the bank")
+
+
+if __name__ == "__main__":
+    main()
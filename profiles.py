@@ -0,0 +1,147 @@
+"""Structured profiles of resumes and job descriptions, extracted once per document.
+
+One model call turns a document into compact JSON: skills, years of experience,
+roles, education and key projects for a resume; title, requirements and
+responsibilities for a job description. Profiles are stored keyed by the hash of the
+document text, so a document seen before costs no call at all, and prompts embed
+profile_text (a few hundred characters) instead of the full document.
+
+Resumes are extracted section by section (resume_sections.split_sections) and the
+partial profile of each section is stored under the section's hash, so a revised
+resume only sends its changed sections; merge_profiles puts the parts together.
+An oversized job description is extracted chunk by chunk the same way
+(chunked_analysis.split_chunks).
+"""
+import json
+
+from skills import skill_set
+
+KINDS = {"resume": "resume", "job_description": "job description"}
+
+SHAPES = {
+    "resume": """{
+          "headline": "current or most recent job title",
+          "years_experience": 0,
+          "skills": ["skill"],
+          "roles": [{"title": "...", "organization": "...", "years": 0}],
+          "education": ["degree, institution"],
+          "projects": [{"name": "...", "summary": "one sentence, with the outcome"}]
+        }""",
+    "job_description": """{
+          "title": "...",
+          "company": "...",
+          "location": "place and on-site/remote",
+          "seniority": "...",
+          "years_experience": 0,
+          "required_skills": ["skill"],
+          "preferred_skills": ["skill"],
+          "responsibilities": ["short phrase"],
+          "education": "...",
+          "about": "one sentence on the team or company"
+        }""",
+}
+
+# The list every taxonomy skill found in the text is merged into
+SKILL_FIELDS = {"resume": "skills", "job_description": "required_skills"}
+
+
+def build_profile_prompt(text, kind):
+    """Builds the prompt extracting the profile of a document."""
+    return f"""
+        Extract a structured profile from the following {KINDS[kind]}. Reply with JSON only, in this shape,
+        leaving out any field the document does not state:
+        {SHAPES[kind]}
+        Keep every value short. List at most 8 roles, 5 projects and 10 responsibilities.
+
+        Document:
+        {text}
+        """
+
+
+def build_sections_profile_prompt(sections):
+    """Builds one prompt extracting a partial resume profile from each numbered section."""
+    numbered = "\n\n".join(
+        f"        Section {number}. {title}\n        {body}" for number, (title, body) in enumerate(sections, 1)
+    )
+    return f"""
+        Extract a structured profile from each numbered resume section below. Reply with JSON only: an object
+        mapping each section number to a profile in this shape, leaving out any field the section does not state:
+        {SHAPES["resume"]}
+        Keep every value short.
+
+        Resume sections:
+{numbered}
+        """
+
+
+def load_json_object(reply):
+    """The JSON object in a model reply, or None."""
+    start, end = reply.find("{"), reply.rfind("}")
+    try:
+        value = json.loads(reply[start:end + 1]) if start >= 0 else None
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def parse_section_profiles(reply, count):
+    """Returns {section number: partial profile} from the model's reply."""
+    profiles = {}
+    for number, profile in (load_json_object(reply) or {}).items():
+        if str(number).isdigit() and 1 <= int(number) <= count and isinstance(profile, dict):
+            profiles[int(number)] = profile
+    return profiles
+
+
+def merge_profiles(partials, text, kind="resume"):
+    """Combines partial profiles in document order: lists are joined, the largest number and first text kept."""
+    profile = {}
+    for partial in partials:
+        for field, value in partial.items():
+            if isinstance(value, list):
+                merged = profile.setdefault(field, [])
+                seen = {format_value(item).lower() for item in merged}
+                merged.extend(item for item in value if format_value(item).lower() not in seen)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                profile[field] = max(value, profile.get(field) or 0)
+            elif value and not profile.get(field):
+                profile[field] = value
+    return add_taxonomy_skills(profile, text, kind)
+
+
+def parse_profile(reply, text, kind):
+    """Returns the profile dict from the model's reply, or None if it is not valid JSON."""
+    profile = load_json_object(reply)
+    return add_taxonomy_skills(profile, text, kind) if profile is not None else None
+
+
+def add_taxonomy_skills(profile, text, kind):
+    """Adds the taxonomy skills found in text that the model left out."""
+    field = SKILL_FIELDS[kind]
+    listed = [skill for skill in profile.get(field) or [] if isinstance(skill, str)]
+    preferred = [skill for skill in profile.get("preferred_skills") or [] if isinstance(skill, str)]
+    known = skill_set("; ".join(listed + preferred))
+    profile[field] = listed + sorted(skill_set(text) - known)
+    return profile
+
+
+def format_value(value):
+    if isinstance(value, dict):
+        # Numbers keep their field name: "years 5"
+        return ", ".join(
+            str(item) if isinstance(item, str) else f"{key.replace('_', ' ')} {item}"
+            for key, item in value.items() if item not in (None, "", [])
+        )
+    if isinstance(value, list):
+        return "; ".join(format_value(item) for item in value)
+    return str(value)
+
+
+def profile_text(profile):
+    """Compact prompt text of a profile: one "field: value" line per stated field."""
+    lines = []
+    for field, value in profile.items():
+        if value in (None, "", [], {}, 0):
+            continue
+        lines.append(f"{field.replace('_', ' ')}: {format_value(value)}")
+    return "\n".join(lines)
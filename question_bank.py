@@ -0,0 +1,242 @@
+"""Persistent interview question bank, indexed by role, skill and difficulty.
+
+Questions live in SQLite and are loaded once into an in-memory index, so serving a
+banked question is a dictionary lookup instead of an LLM call. A lookup prefers
+questions on skills the job description asks for and the resume shows, then other
+skills of the role, then general questions for the role. Generated questions that
+look reusable are written back, so the bank grows with use.
+
+    bank = QuestionBank()
+    question = bank.find(job_description_text, resume_text, "easy", exclude=asked)
+    bank.add(question, job_description_text, resume_text, "easy")
+"""
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+import metrics
+from skills import skill_set, words
+
+logger = logging.getLogger("interviewer.question_bank")
+
+DEFAULT_PATH = os.environ.get("QUESTION_BANK_PATH", "question_bank.db")
+
+# Questions get harder as the interview goes on
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Positions offered by the practice pages
+ROLES = ("Software Engineer", "Data Scientist", "DevOps Engineer", "Product Manager")
+
+# The questions fy.py and project_gemini.py used to hard-code, easiest first
+SEED_QUESTIONS = {
+    "Software Engineer": [
+        "What programming languages are you proficient in?",
+        "How do you approach debugging a program?",
+        "Tell me about a challenging project you've worked on.",
+    ],
+    "Data Scientist": [
+        "What experience do you have with data analysis?",
+        "How do you handle missing data in a dataset?",
+        "Explain a machine learning project you've worked on.",
+    ],
+    "DevOps Engineer": [
+        "What tools do you use for continuous integration?",
+        "How would you set up an automated deployment pipeline?",
+        "Describe a time when you improved the reliability of a system.",
+    ],
+    "Product Manager": [
+        "How do you prioritize features in a product roadmap?",
+        "Tell me about a time you handled conflicting stakeholder feedback.",
+        "How do you measure the success of a product?",
+    ],
+}
+
+# Generated questions outside these lengths are not worth keeping
+MIN_QUESTION_CHARS = 20
+MAX_QUESTION_CHARS = 300
+
+# Phrasings that tie a question to one candidate's resume
+PERSONAL = re.compile(r"\b(your (resume|cv|time at|role at|work at)|you (mentioned|listed|wrote|noted))\b", re.I)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    question_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    normalized TEXT NOT NULL UNIQUE,
+    role TEXT,
+    difficulty TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_skills (
+    question_id INTEGER NOT NULL,
+    skill TEXT NOT NULL,
+    PRIMARY KEY (skill, question_id)
+);
+"""
+
+
+def normalize(question):
+    return " ".join(lower for lower, _ in words(question))
+
+
+def question_difficulty(asked_count, total=5):
+    """Difficulty of the next question after asked_count of total: simple first, then more complex."""
+    return DIFFICULTIES[min(asked_count * len(DIFFICULTIES) // total, len(DIFFICULTIES) - 1)]
+
+
+def infer_role(job_description_text):
+    """The known role named in a job description, or None."""
+    text = normalize(job_description_text or "")
+    found = [(text.find(normalize(role)), role) for role in ROLES if normalize(role) in text]
+    return min(found)[1] if found else None
+
+
+def is_reusable(question, resume_text=""):
+    """Whether a generated question is fit for other candidates: a real question with nothing personal in it."""
+    question = question.strip()
+    if not MIN_QUESTION_CHARS <= len(question) <= MAX_QUESTION_CHARS or "?" not in question:
+        return False
+    if question.startswith(("Could not", "I apologize")) or PERSONAL.search(question):
+        return False
+    # Company, project and people names from the resume: capitalized words that are not skills
+    skill_words = {lower for skill in skill_set(question) for lower, _ in words(skill)}
+    resume_words = {lower for lower, _ in words(resume_text)}
+    for position, (lower, original) in enumerate(words(question)):
+        if position and original[0].isupper() and lower not in skill_words and lower in resume_words:
+            return False
+    return True
+
+
+class QuestionBank:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.by_skill = {}     # skill -> [(question, role, difficulty)]
+        self.by_role = {}      # role -> [(question, role, difficulty)], every question of the role
+        self.known = set()     # normalized questions, for dedupe
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executescript(SCHEMA)
+            if not connection.execute("SELECT 1 FROM questions LIMIT 1").fetchone():
+                self.seed(connection)
+            self.load(connection)
+        finally:
+            connection.close()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def seed(self, connection):
+        with connection:
+            for role, questions in SEED_QUESTIONS.items():
+                for difficulty, question in zip(DIFFICULTIES, questions):
+                    self.insert(connection, question, role, difficulty, skill_set(question), "seed")
+
+    def load(self, connection):
+        skills = {}
+        for question_id, skill in connection.execute("SELECT question_id, skill FROM question_skills"):
+            skills.setdefault(question_id, []).append(skill)
+        rows = connection.execute("SELECT question_id, question, normalized, role, difficulty FROM questions")
+        for question_id, question, normalized, role, difficulty in rows:
+            self.index(question, normalized, role, difficulty, skills.get(question_id, ()))
+        logger.info("Loaded %d banked questions", len(self.known))
+
+    def index(self, question, normalized, role, difficulty, skills):
+        entry = (question, role, difficulty)
+        self.known.add(normalized)
+        for skill in skills:
+            self.by_skill.setdefault(skill, []).append(entry)
+        if role:
+            self.by_role.setdefault(role, []).append(entry)
+
+    def insert(self, connection, question, role, difficulty, skills, source):
+        """Inserts one question; returns False if the bank already has it."""
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO questions (question, normalized, role, difficulty, source, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (question, normalize(question), role, difficulty, source, time.time()),
+        )
+        if not cursor.rowcount:
+            return False
+        connection.executemany(
+            "INSERT OR IGNORE INTO question_skills (question_id, skill) VALUES (?, ?)",
+            [(cursor.lastrowid, skill) for skill in skills],
+        )
+        return True
+
+    def find(self, job_description_text, resume_text, difficulty, exclude=()):
+        """Returns a banked question for this role and candidate, or None."""
+        role = infer_role(job_description_text)
+        role_skills = skill_set(job_description_text)
+        excluded = {normalize(question) for question in exclude if question}
+        tiers = (
+            [entry for skill in role_skills & skill_set(resume_text) for entry in self.by_skill.get(skill, ())],
+            [entry for skill in role_skills for entry in self.by_skill.get(skill, ())],
+            self.by_role.get(role, []),
+        )
+        for entries in tiers:
+            candidates = [
+                entry for entry in entries
+                if entry[2] == difficulty and normalize(entry[0]) not in excluded
+            ]
+            if candidates:
+                # Questions written for the same role first
+                same_role = [entry for entry in candidates if entry[1] == role]
+                metrics.QUESTION_BANK_LOOKUPS.labels("hit").inc()
+                return random.choice(same_role or candidates)[0]
+        metrics.QUESTION_BANK_LOOKUPS.labels("miss").inc()
+        return None
+
+    def pick(self, skill, difficulty, exclude=()):
+        """A banked question on skill, at difficulty if there is one; None if the skill has none left."""
+        excluded = {normalize(question) for question in exclude if question}
+        candidates = [entry for entry in self.by_skill.get(skill, ()) if normalize(entry[0]) not in excluded]
+        at_level = [entry for entry in candidates if entry[2] == difficulty]
+        return random.choice(at_level or candidates)[0] if candidates else None
+
+    def add(self, question, job_description_text, resume_text, difficulty, source="generated"):
+        """Banks a generated question if it is reusable and new; returns whether it was added."""
+        if not is_reusable(question, resume_text):
+            return False
+        question = question.strip()
+        role = infer_role(job_description_text)
+        # Indexed under the skills it asks about that the role needs, or under the role alone
+        skills = skill_set(question) & skill_set(job_description_text) or skill_set(question)
+        if not skills and not role:
+            return False
+        return self.add_many([(question, role, difficulty, skills)], source) == 1
+
+    def add_many(self, questions, source):
+        """Banks (question, role, difficulty, skills) tuples in one transaction; returns how many were new."""
+        added = []
+        with self.lock:
+            connection = self.connect()
+            try:
+                with connection:
+                    for question, role, difficulty, skills in questions:
+                        normalized = normalize(question)
+                        if normalized in self.known:
+                            continue
+                        if self.insert(connection, question, role, difficulty, skills, source):
+                            added.append((question, normalized, role, difficulty, skills))
+            except sqlite3.Error as e:
+                logger.error("Question bank write failed: %s", e)
+                return 0
+            finally:
+                connection.close()
+            for entry in added:
+                self.index(*entry)
+        return len(added)
+
+    def count(self, role, skill, difficulty):
+        """Banked questions for a role (any role if None) on a skill (any skill if None) at a difficulty."""
+        entries = self.by_skill.get(skill, ()) if skill else self.by_role.get(role, ())
+        return sum(1 for entry in entries if entry[2] == difficulty and (role is None or entry[1] == role))
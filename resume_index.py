@@ -0,0 +1,228 @@
+"""Local ranking of many resumes against a job description, without LLM calls.
+
+Resumes are tokenized with extract_keywords and kept in an inverted index
+(term -> {document: term frequency}) that supports adding and removing documents.
+Candidates are scored with BM25, or with TF-IDF cosine similarity computed in NumPy,
+so only the best matches need to go to analyze_resume.
+
+Usage:
+    python resume_index.py add --index resumes.npz resumes/*.pdf
+    python resume_index.py remove --index resumes.npz old_resume.pdf
+    python resume_index.py rank --index resumes.npz --job-description jd.pdf --top-k 20
+"""
+import argparse
+import math
+import os
+from collections import Counter
+
+import numpy as np
+
+from text_utils import extract_keywords
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+class ResumeIndex:
+    def __init__(self):
+        self.postings = {}      # term -> {doc_id: term frequency}
+        self.doc_terms = {}     # doc_id -> Counter of its terms, used for removal
+        self.doc_lengths = {}   # doc_id -> number of tokens
+        self.total_length = 0
+        self._norms = None      # TF-IDF vector norms, rebuilt after the index changes
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id, text):
+        """Index a document, replacing any earlier version with the same id."""
+        if doc_id in self:
+            self.remove(doc_id)
+        terms = Counter(extract_keywords(text))
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        self._norms = None
+
+    def remove(self, doc_id):
+        """Drop a document from the index."""
+        terms = self.doc_terms.pop(doc_id)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self._norms = None
+
+    def idf(self, term):
+        """BM25 inverse document frequency (always positive)."""
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def bm25_scores(self, query_text):
+        """Returns {doc_id: BM25 score} for documents sharing at least one term with the query."""
+        if not len(self):
+            return {}
+        average_length = self.total_length / len(self)
+        scores = {}
+        for term, query_count in Counter(extract_keywords(query_text)).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = self.idf(term) * query_count
+            for doc_id, count in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * count * (BM25_K1 + 1) / (count + norm)
+        return scores
+
+    def _tfidf_norms(self):
+        """Euclidean norm of every document's TF-IDF vector."""
+        if self._norms is None:
+            doc_count = len(self)
+            squares = dict.fromkeys(self.doc_lengths, 0.0)
+            for term, postings in self.postings.items():
+                idf = math.log(doc_count / len(postings)) + 1
+                for doc_id, count in postings.items():
+                    squares[doc_id] += (count * idf) ** 2
+            self._norms = {doc_id: math.sqrt(value) for doc_id, value in squares.items()}
+        return self._norms
+
+    def tfidf_scores(self, query_text):
+        """Returns {doc_id: cosine similarity} between TF-IDF vectors of the query and each document."""
+        if not len(self):
+            return {}
+        query_terms = Counter(term for term in extract_keywords(query_text) if term in self.postings)
+        if not query_terms:
+            return {}
+
+        doc_ids = list(self.doc_lengths)
+        column = {doc_id: index for index, doc_id in enumerate(doc_ids)}
+        terms = list(query_terms)
+        idf = np.array([math.log(len(self) / len(self.postings[term])) + 1 for term in terms])
+        query_vector = np.array([query_terms[term] for term in terms]) * idf
+
+        # Documents x query terms; every other term contributes nothing to the dot product
+        matrix = np.zeros((len(doc_ids), len(terms)))
+        for row, term in enumerate(terms):
+            for doc_id, count in self.postings[term].items():
+                matrix[column[doc_id], row] = count
+        dots = (matrix * idf) @ query_vector
+
+        norms = self._tfidf_norms()
+        doc_norms = np.array([norms[doc_id] for doc_id in doc_ids])
+        similarities = dots / (doc_norms * np.linalg.norm(query_vector))
+        return {doc_id: float(similarities[index]) for index, doc_id in enumerate(doc_ids) if dots[index] > 0}
+
+    def rank(self, query_text, top_k=None, method="bm25", candidates=None):
+        """Returns [(doc_id, score)] sorted best first, optionally limited to top_k and to candidate ids."""
+        scores = self.tfidf_scores(query_text) if method == "tfidf" else self.bm25_scores(query_text)
+        if candidates is not None:
+            candidates = set(candidates)
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in candidates}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k] if top_k else ranked
+
+    def save(self, path):
+        """Writes the index as flat NumPy arrays (vocabulary + CSR postings)."""
+        doc_ids = list(self.doc_lengths)
+        doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        vocabulary = sorted(self.postings)
+
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        documents = []
+        counts = []
+        for index, term in enumerate(vocabulary):
+            postings = self.postings[term]
+            documents.extend(doc_numbers[doc_id] for doc_id in postings)
+            counts.extend(postings.values())
+            offsets[index + 1] = len(documents)
+
+        with open(path, "wb") as file:
+            np.savez_compressed(
+                file,
+                doc_ids=np.array(doc_ids, dtype=str),
+                doc_lengths=np.array([self.doc_lengths[doc_id] for doc_id in doc_ids], dtype=np.int32),
+                vocabulary=np.array(vocabulary, dtype=str),
+                offsets=offsets,
+                documents=np.array(documents, dtype=np.int32),
+                counts=np.array(counts, dtype=np.int32),
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by save."""
+        index = cls()
+        with np.load(path) as arrays:
+            doc_ids = arrays["doc_ids"].tolist()
+            vocabulary = arrays["vocabulary"].tolist()
+            offsets = arrays["offsets"]
+            documents = arrays["documents"]
+            counts = arrays["counts"].tolist()
+            doc_lengths = arrays["doc_lengths"].tolist()
+
+        for doc_id, length in zip(doc_ids, doc_lengths):
+            index.doc_terms[doc_id] = Counter()
+            index.doc_lengths[doc_id] = length
+        index.total_length = sum(doc_lengths)
+
+        for term_number, term in enumerate(vocabulary):
+            start, stop = offsets[term_number], offsets[term_number + 1]
+            postings = {}
+            for doc_number, count in zip(documents[start:stop].tolist(), counts[start:stop]):
+                doc_id = doc_ids[doc_number]
+                postings[doc_id] = count
+                index.doc_terms[doc_id][term] = count
+            index.postings[term] = postings
+        return index
+
+    @classmethod
+    def open(cls, path):
+        """Loads the index at path, or returns an empty one if it does not exist yet."""
+        if path and os.path.exists(path):
+            return cls.load(path)
+        return cls()
+
+
+def main():
+    from pdf_extraction import extract_file_text
+
+    parser = argparse.ArgumentParser(description="Maintain a local resume index and rank it against a job description.")
+    parser.add_argument("--index", required=True, help="Index file (.npz)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Index resume PDFs")
+    add.add_argument("resumes", nargs="+")
+    remove = commands.add_parser("remove", help="Drop resumes from the index by file name")
+    remove.add_argument("resumes", nargs="+")
+    rank = commands.add_parser("rank", help="Rank indexed resumes for a job description")
+    rank.add_argument("--job-description", required=True, help="Job description PDF")
+    rank.add_argument("--top-k", type=int, default=20)
+    rank.add_argument("--method", choices=["bm25", "tfidf"], default="bm25")
+    args = parser.parse_args()
+
+    index = ResumeIndex.open(args.index)
+    if args.command == "add":
+        for path in args.resumes:
+            index.add(os.path.basename(path), extract_file_text(path))
+        index.save(args.index)
+    elif args.command == "remove":
+        for path in args.resumes:
+            name = os.path.basename(path)
+            if name in index:
+                index.remove(name)
+        index.save(args.index)
+    else:
+        for doc_id, score in index.rank(extract_file_text(args.job_description), args.top_k, args.method):
+            print(f"{score:8.3f}  {doc_id}")
+    print(f"{len(index)} resumes indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Section-level resume analysis, so a revised resume only costs its changed sections.
+
+The extracted text is split at its headings (Experience, Education, SKILLS, ...).
+Each section is hashed together with the job description it is analyzed against,
+and its analysis is stored under that hash. When a candidate re-uploads an edited
+resume, only sections whose text changed are sent to the model, all of them in one
+prompt, and the report is reassembled from stored and new analyses in document
+order. Re-upload cost grows with the edit, not with the document.
+"""
+import re
+
+from text_utils import document_hash
+
+HEADINGS = frozenset("""
+summary|professional summary|profile|about me|objective|career objective|experience|work experience|
+professional experience|employment|employment history|work history|career history|education|
+education and training|skills|technical skills|core skills|key skills|core competencies|competencies|
+projects|key projects|personal projects|certifications|certificates|licenses and certifications|awards|
+honors|achievements|publications|languages|interests|hobbies|volunteering|volunteer experience|
+leadership|activities|courses|training|references|contact|additional information
+""".replace("\n", "").split("|"))
+
+# Text before the first heading: name, contact details, often a short summary
+HEADER = "Header"
+
+# Output budget per analyzed section, and for the whole reply
+TOKENS_PER_SECTION = 400
+MAX_OUTPUT_TOKENS = 2000
+
+
+def heading_text(line):
+    return line.strip().rstrip(":").strip()
+
+
+def is_heading(line):
+    """A line that is one of the usual section names, e.g. "Work Experience:"."""
+    return heading_text(line).lower() in HEADINGS
+
+
+def may_be_heading(line):
+    """A short all-caps line without commas or digits, e.g. "OPEN SOURCE" (but not "PYTHON, SQL, AWS")."""
+    stripped = heading_text(line)
+    if not stripped or len(stripped) > 40 or len(stripped.split()) > 5:
+        return False
+    if any(char == "," or char.isdigit() for char in stripped):
+        return False
+    letters = [char for char in stripped if char.isalpha()]
+    return len(letters) >= 4 and stripped.isupper()
+
+
+def split_sections(text):
+    """Returns [(title, body)] in document order; a resume without headings is one section.
+
+    Besides the usual section names, an all-caps line counts as a heading when a body follows it and it is
+    not the first line (usually the candidate's name). A heading keeps its section even with an empty body.
+    """
+    lines = text.splitlines()
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    headings = set()
+    for position, i in enumerate(filled):
+        if is_heading(lines[i]):
+            headings.add(i)
+        elif position > 0 and may_be_heading(lines[i]):
+            following = filled[position + 1] if position + 1 < len(filled) else None
+            if following is not None and not is_heading(lines[following]) and not may_be_heading(lines[following]):
+                headings.add(i)
+
+    sections = []
+    title, body = HEADER, []
+    for i, line in enumerate(lines):
+        if i in headings:
+            if title != HEADER or "".join(body).strip():
+                sections.append((title, "\n".join(body).strip()))
+            title, body = heading_text(line).title(), []
+        else:
+            body.append(line)
+    if title != HEADER or "".join(body).strip():
+        sections.append((title, "\n".join(body).strip()))
+    return sections
+
+
+def section_key(title, body, job_description):
+    """Stable key of one section's analysis against one job description."""
+    return document_hash(f"{title}\n{body}\n{job_description or ''}")
+
+
+def build_section_prompt(sections, job_description=None):
+    """Builds one prompt analyzing several resume sections, each answered under its number."""
+    numbered = "\n\n".join(
+        f"        ### {number}. {title}\n        {body}" for number, (title, body) in enumerate(sections, 1)
+    )
+    context = f"\n        Job description:\n        {job_description}\n" if job_description else ""
+    return f"""
+        Analyze the following resume sections. Evaluate each one on its own based on its relevance to the
+        job description, focusing on technical skills, relevant experience and qualifications, and suggest
+        concrete improvements.
+        Reply with one analysis per section. Start each with a line "### <section number>" and write nothing
+        before the first one.
+        {context}
+        Resume sections:
+{numbered}
+        """
+
+
+def parse_section_analyses(reply, count):
+    """Returns {section number: analysis} from the model's reply."""
+    parts = re.split(r"^\s*#{2,4}\s*(\d+)\b[^\n]*$", reply, flags=re.M)
+    analyses = {}
+    for number, analysis in zip(parts[1::2], parts[2::2]):
+        number = int(number)
+        if 1 <= number <= count and analysis.strip():
+            analyses[number] = analysis.strip()
+    return analyses
+
+
+def merge_section_analyses(sections, analyses, reanalyzed):
+    """Assembles the report from the analyses of sections (None where missing), in document order."""
+    total = len(sections)
+    if reanalyzed < total:
+        note = f"_Re-analyzed {reanalyzed} of {total} sections; the others have not changed since the last upload._"
+    else:
+        note = f"_Analyzed {total} resume sections._"
+    parts = [note]
+    for (title, _), analysis in zip(sections, analyses):
+        if analysis:
+            parts.append(f"**{title}**\n\n{analysis}")
+    return "\n\n".join(parts)
@@ -0,0 +1,92 @@
+"""Model routing per task: which model, output token cap, temperature and timeout
+each kind of call uses, and whether slow calls may be hedged.
+
+Short, frequent calls (interview questions) go to the cheapest model; the final
+report, produced once per interview and read most closely, goes to the strongest.
+Every entry can be overridden from a JSON file without code changes, e.g.
+
+    {"report": {"model": "gemini-1.5-flash", "timeout": 60}, "question": {"max_output_tokens": 200}}
+
+    MODEL_ROUTES   path of that file (default model_routes.json; missing means defaults)
+
+Calls made through llm.generate_routed are tagged with their route, so telemetry
+and the /metrics endpoint report latency and cost per route.
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger("interviewer.routing")
+
+ROUTES_PATH = os.environ.get("MODEL_ROUTES", "model_routes.json")
+
+SETTINGS = ("model", "max_output_tokens", "temperature", "timeout", "hedge")
+
+
+def entry(model, max_output_tokens, temperature, timeout, hedge=False):
+    return {
+        "model": model,
+        "max_output_tokens": max_output_tokens,
+        "temperature": temperature,
+        "timeout": timeout,
+        # Whether a slow call may be hedged with a duplicate request; off by default (see hedging.py)
+        "hedge": hedge,
+    }
+
+
+DEFAULT_ROUTES = {
+    "question": entry("gemini-1.5-flash-8b", 150, 0.5, 15),
+    "question_batch": entry("gemini-1.5-flash-8b", 4000, 0.9, 120),
+    "answer_feedback": entry("gemini-1.5-flash", 1000, 0.5, 30),
+    "profile": entry("gemini-1.5-flash", 800, 0, 30),
+    "resume_analysis": entry("gemini-1.5-flash", 2000, 0.5, 60),
+    "job_description_analysis": entry("gemini-1.5-flash", 2000, 0.5, 60),
+    "report": entry("gemini-1.5-pro", 1000, 0.5, 90),
+}
+
+# USD per million (input, output) tokens, prompts up to 128k tokens
+PRICES = {
+    "gemini-1.5-flash-8b": (0.0375, 0.15),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+
+def load_routes(path=ROUTES_PATH):
+    """The default routes, with the settings given in the routes file if one exists."""
+    routes = {task: dict(route) for task, route in DEFAULT_ROUTES.items()}
+    try:
+        with open(path, encoding="utf-8") as file:
+            overrides = json.load(file)
+    except OSError:
+        return routes
+    except ValueError as e:
+        logger.error("Ignoring unreadable routes file %s: %s", path, e)
+        return routes
+    if not isinstance(overrides, dict):
+        logger.error("Ignoring routes file %s: expected a JSON object of routes", path)
+        return routes
+    for task, settings in overrides.items():
+        if not isinstance(settings, dict):
+            logger.warning("Ignoring route %s: expected an object of settings, got %r", task, settings)
+            continue
+        unknown = set(settings) - set(SETTINGS)
+        if task not in routes or unknown:
+            logger.warning("Ignoring route %s: unknown task or settings %s", task, sorted(unknown))
+            continue
+        routes[task].update(settings)
+    return routes
+
+
+routes = load_routes()
+
+
+def route(task, **overrides):
+    """The settings of a task's route; overrides win, e.g. a token cap computed per call."""
+    return {**routes[task], **overrides}
+
+
+def cost(model_name, input_tokens, output_tokens):
+    """USD cost of one call; 0 for a model without a known price."""
+    input_price, output_price = PRICES.get(model_name, (0.0, 0.0))
+    return input_tokens / 1e6 * input_price + output_tokens / 1e6 * output_price
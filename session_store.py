@@ -0,0 +1,239 @@
+"""Durable interview sessions in SQLite (WAL mode).
+
+A session row holds the uploaded documents, their analyses and the scalar state
+(current question, counter, completion). Conversation turns are append-only rows,
+so resuming a session replays them in order and no LLM call has to be repeated.
+
+Writes are queued and committed by one background thread in small batches: the
+request thread only pays for a queue put, and many turns share one fsync.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+logger = logging.getLogger("interviewer.session_store")
+
+DEFAULT_PATH = os.environ.get("SESSION_DB_PATH", "interview_sessions.db")
+
+# Session columns callers may update with save_fields
+SESSION_FIELDS = (
+    "resume_text",
+    "resume_prefix",
+    "job_description_text",
+    "job_description_prefix",
+    "resume_analysis",
+    "job_description_analysis",
+    "current_question",
+    "question_counter",
+    "interview_completed",
+    "report",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    resume_text TEXT,
+    resume_prefix TEXT,
+    job_description_text TEXT,
+    job_description_prefix TEXT,
+    resume_analysis TEXT,
+    job_description_analysis TEXT,
+    current_question TEXT,
+    question_counter INTEGER NOT NULL DEFAULT 0,
+    interview_completed INTEGER NOT NULL DEFAULT 0,
+    report TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    turn_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_by_session ON turns (session_id, turn_id);
+CREATE TABLE IF NOT EXISTS question_history (
+    candidate TEXT NOT NULL,
+    question TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS question_history_by_candidate ON question_history (candidate);
+CREATE TABLE IF NOT EXISTS profiles (
+    document_hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS section_analyses (
+    section_key TEXT PRIMARY KEY,
+    analysis TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only risks the last commits on power loss, never corruption
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_PATH, batch_interval=0.05, batch_size=256):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        with closing(connect(path)) as connection:
+            connection.executescript(SCHEMA)
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="session-store-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.batch_interval
+            # Gather whatever else arrives shortly after, so it shares one commit
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    for sql, params in batch:
+                        connection.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error("Session store write failed: %s", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def create(self, session_id=None):
+        """Starts a new session and returns its id."""
+        session_id = session_id or uuid.uuid4().hex
+        now = time.time()
+        self.queue.put((
+            "INSERT OR IGNORE INTO sessions (session_id, created_at, updated_at) VALUES (?, ?, ?)",
+            (session_id, now, now),
+        ))
+        return session_id
+
+    def save_fields(self, session_id, **fields):
+        """Updates scalar session state, e.g. save_fields(sid, current_question=q, question_counter=2)."""
+        unknown = set(fields) - set(SESSION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown session fields: {', '.join(sorted(unknown))}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self.queue.put((
+            f"UPDATE sessions SET {assignments}, updated_at = ? WHERE session_id = ?",
+            (*fields.values(), time.time(), session_id),
+        ))
+
+    def append_turn(self, session_id, kind, payload):
+        """Appends one turn record: kind "message" ({role, content}) or "response" ({question, answer, feedback})."""
+        self.queue.put((
+            "INSERT INTO turns (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+            (session_id, kind, json.dumps(payload, ensure_ascii=False), time.time()),
+        ))
+
+    def record_question(self, candidate, question, signature):
+        """Appends an asked question and its MinHash signature to a candidate's history."""
+        self.queue.put((
+            "INSERT INTO question_history (candidate, question, signature, created_at) VALUES (?, ?, ?, ?)",
+            (candidate, question, signature, time.time()),
+        ))
+
+    def question_history(self, candidate):
+        """Returns [(question, signature)] asked to a candidate across all sessions, oldest first."""
+        self.flush()
+        with closing(connect(self.path)) as connection:
+            return connection.execute(
+                "SELECT question, signature FROM question_history WHERE candidate = ? ORDER BY rowid",
+                (candidate,),
+            ).fetchall()
+
+    def save_profile(self, document_hash, kind, profile):
+        """Stores the structured profile of a document, keyed by the hash of its text."""
+        self.queue.put((
+            "INSERT OR REPLACE INTO profiles (document_hash, kind, profile, created_at) VALUES (?, ?, ?, ?)",
+            (document_hash, kind, json.dumps(profile, ensure_ascii=False, separators=(",", ":")), time.time()),
+        ))
+
+    def load_profile(self, document_hash):
+        """Returns the stored profile of a document, or None."""
+        return self.load_profiles([document_hash]).get(document_hash)
+
+    def load_profiles(self, document_hashes):
+        """Returns {hash: profile} for the stored ones among document_hashes."""
+        self.flush()
+        placeholders = ", ".join("?" * len(document_hashes))
+        with closing(connect(self.path)) as connection:
+            rows = connection.execute(
+                f"SELECT document_hash, profile FROM profiles WHERE document_hash IN ({placeholders})",
+                list(document_hashes),
+            ).fetchall()
+        return {key: json.loads(profile) for key, profile in rows}
+
+    def save_section_analysis(self, section_key, analysis):
+        """Stores the analysis of one resume section against one job description."""
+        self.queue.put((
+            "INSERT OR REPLACE INTO section_analyses (section_key, analysis, created_at) VALUES (?, ?, ?)",
+            (section_key, analysis, time.time()),
+        ))
+
+    def load_section_analyses(self, section_keys):
+        """Returns {section key: analysis} for the stored ones among section_keys."""
+        self.flush()
+        placeholders = ", ".join("?" * len(section_keys))
+        with closing(connect(self.path)) as connection:
+            rows = connection.execute(
+                f"SELECT section_key, analysis FROM section_analyses WHERE section_key IN ({placeholders})",
+                list(section_keys),
+            ).fetchall()
+        return dict(rows)
+
+    def flush(self):
+        """Blocks until every queued write is committed."""
+        self.queue.join()
+
+    def load(self, session_id):
+        """Returns the stored session as a dict (fields plus messages and user_responses), or None."""
+        self.flush()
+        with closing(connect(self.path)) as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            turns = connection.execute(
+                "SELECT kind, payload FROM turns WHERE session_id = ? ORDER BY turn_id", (session_id,)
+            ).fetchall()
+
+        session = {name: row[name] for name in SESSION_FIELDS}
+        session["interview_completed"] = bool(session["interview_completed"])
+        for name in ("resume_text", "resume_prefix", "job_description_text", "job_description_prefix"):
+            session[name] = session[name] or ""
+        session["messages"] = []
+        session["user_responses"] = []
+        for kind, payload in turns:
+            if kind == "message":
+                session["messages"].append(json.loads(payload))
+            elif kind == "response":
+                session["user_responses"].append(json.loads(payload))
+        return session
@@ -0,0 +1,153 @@
+"""Skill extraction with a taxonomy compiled into an Aho-Corasick automaton.
+
+skill_taxonomy.txt lists canonical skills with their synonyms and multi-word phrases.
+They are compiled once into an automaton over words, so extracting every known skill
+from a document is a single linear pass over its words, however large the taxonomy.
+Overlapping matches resolve to the longest phrase ("spring boot" over "spring").
+
+    extract_skills(text)   -> {canonical skill: mentions}
+    skill_set(text)        -> frozenset of canonical skills (cached per text)
+    skill_category(skill)  -> taxonomy section, e.g. "database"
+"""
+import os
+import re
+from collections import Counter, deque
+from functools import lru_cache
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.txt")
+
+# Words: letters/digits with inner "+", "#" and "." kept, so "c++", "c#", ".net" and "node.js" stay whole
+WORD = re.compile(r"\.?\w[\w+#.]*")
+
+
+def words(text):
+    """Splits text into (lowercase, original) words, dropping trailing sentence dots."""
+    result = []
+    for match in WORD.finditer(text):
+        word = match.group().rstrip(".")
+        if word:
+            result.append((word.lower(), word))
+    return result
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over words: goto transitions, failure links and outputs per state."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]   # per state: [(skill, phrase length, exact case words or None)]
+        self.categories = {}
+
+    def add(self, phrase, skill):
+        exact = phrase.startswith("=")
+        tokens = words(phrase.lstrip("="))
+        if not tokens:
+            return
+        state = 0
+        for lower, _ in tokens:
+            next_state = self.goto[state].get(lower)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][lower] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        entry = (skill, len(tokens), tuple(original for _, original in tokens) if exact else None)
+        for existing, _, existing_exact in self.output[state]:
+            if existing_exact == entry[2]:
+                if existing == skill:
+                    return
+                raise ValueError(f"'{phrase}' maps to both {existing} and {skill}")
+        self.output[state].append(entry)
+
+    def build(self):
+        """Computes failure links breadth-first and merges the outputs they lead to."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        return self
+
+    def matches(self, text):
+        """Yields (start word, end word, skill) for every phrase occurrence."""
+        tokens = words(text)
+        state = 0
+        for position, (lower, _) in enumerate(tokens):
+            while state and lower not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(lower, 0)
+            for skill, length, exact in self.output[state]:
+                start = position - length + 1
+                if exact and tuple(original for _, original in tokens[start:position + 1]) != exact:
+                    continue
+                yield start, position + 1, skill
+
+    def extract(self, text):
+        """Returns {skill: mentions}, keeping the longest phrase where matches overlap."""
+        found = Counter()
+        covered_until = 0
+        # Longest first among matches starting at the same word, then left to right
+        for start, end, skill in sorted(self.matches(text), key=lambda match: (match[0], -match[1])):
+            if start >= covered_until:
+                found[skill] += 1
+                covered_until = end
+        return found
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    """Parses the taxonomy file into a compiled SkillMatcher."""
+    matcher = SkillMatcher()
+    category = None
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("["):
+                category = line.strip("[]")
+                continue
+            name, _, synonyms = line.partition("|")
+            name = name.strip()
+            skill = name.rstrip("*")
+            matcher.categories[skill] = category
+            phrases = [phrase.strip() for phrase in synonyms.split(";") if phrase.strip()]
+            if not name.endswith("*"):
+                phrases.append(skill)
+            for phrase in phrases:
+                try:
+                    matcher.add(phrase, skill)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from None
+    return matcher.build()
+
+
+matcher = load_taxonomy()
+
+
+def extract_skills(text):
+    """Returns {canonical skill: mentions} found in text."""
+    return matcher.extract(text)
+
+
+@lru_cache(maxsize=256)
+def skill_set(text):
+    """The canonical skills mentioned in text, cached so repeated reruns cost nothing."""
+    return frozenset(matcher.extract(text))
+
+
+def skill_category(skill):
+    return matcher.categories.get(skill)
+
+
+def format_skills(skills, limit=25):
+    """Comma-separated skills for prompts, sorted for stable output."""
+    return ", ".join(sorted(skills)[:limit]) or "none found"
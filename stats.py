@@ -0,0 +1,9 @@
+"""Small statistics helpers shared by the latency and token tracking modules."""
+
+
+def percentile(values, fraction):
+    """The value below which fraction of values lie (nearest rank), or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,156 @@
+"""Structured LLM call telemetry: one JSON line per call in a rotating local file.
+
+Each event carries the function, model, input/output tokens, time to first token,
+total latency, retries, limiter wait, cache outcome and whether the reply was cut
+off at its output cap (see instrumentation.py), and for calls made through a model
+route (routing.py) the route, its output cap and its cost.
+
+Summarize with:
+    python telemetry.py                     # per-function calls, tokens, cost, latency percentiles
+    python telemetry.py --since 2024-06-01 --json
+    python telemetry.py --by route           # the same per model route
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import app_logging
+from stats import percentile
+
+TELEMETRY_PATH = os.environ.get("LLM_TELEMETRY_PATH", os.path.join("logs", "llm_calls.jsonl"))
+MAX_BYTES = int(os.environ.get("LLM_TELEMETRY_MAX_BYTES", 10 * 1024 * 1024))
+BACKUP_COUNT = int(os.environ.get("LLM_TELEMETRY_BACKUPS", 5))
+
+# USD per million tokens (gemini-1.5-flash, prompts up to 128k tokens), for events without a route
+INPUT_PRICE = float(os.environ.get("LLM_INPUT_PRICE_PER_M", 0.075))
+OUTPUT_PRICE = float(os.environ.get("LLM_OUTPUT_PRICE_PER_M", 0.30))
+
+logger = logging.getLogger("interviewer.telemetry")
+logger.propagate = False
+_lock = threading.Lock()
+
+
+def _sink():
+    """Attaches the rotating file handler on first use, behind a queue so callers never wait on the file."""
+    with _lock:
+        if not logger.handlers:
+            directory = os.path.dirname(TELEMETRY_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                TELEMETRY_PATH, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            app_logging.attach_queued(logger, handler)
+            logger.setLevel(logging.INFO)
+    return logger
+
+
+def emit(record):
+    """Writes one LLM call event."""
+    try:
+        _sink().info(json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False))
+    except OSError:
+        # Telemetry must never break an interview
+        pass
+
+
+def read_events(path=TELEMETRY_PATH, since=None):
+    """Yields events from the current file and its rotated backups, oldest first."""
+    # Rotated backups are path.1 (newest) to path.N; other siblings such as path.bak are not ours
+    paths = [name for name in glob.glob(f"{glob.escape(path)}.*") if name.rsplit(".", 1)[1].isdigit()]
+    paths.sort(key=lambda name: -int(name.rsplit(".", 1)[1]))
+    if os.path.exists(path):
+        paths.append(path)
+    for name in paths:
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is None or event.get("ts", 0) >= since:
+                    yield event
+
+
+def event_cost(event, input_price=INPUT_PRICE, output_price=OUTPUT_PRICE):
+    """The cost of a routed call as recorded, otherwise estimated at the flat prices."""
+    if event.get("route"):
+        return event.get("cost_usd", 0.0)
+    return event.get("input_tokens", 0) / 1e6 * input_price + event.get("output_tokens", 0) / 1e6 * output_price
+
+
+def summarize(events, input_price=INPUT_PRICE, output_price=OUTPUT_PRICE, by="function"):
+    """Aggregates events per function (or per route): counts, tokens, cost and latency percentiles."""
+    groups = {}
+    for event in events:
+        groups.setdefault(event.get(by) or "unknown", []).append(event)
+
+    summary = {}
+    for function, group in sorted(groups.items()):
+        called = [event for event in group if event.get("attempts")]
+        totals = [event["total"] for event in called]
+        ttfts = [event["ttft"] for event in called if event.get("ttft") is not None]
+        input_tokens = sum(event.get("input_tokens", 0) for event in group)
+        output_tokens = sum(event.get("output_tokens", 0) for event in group)
+        cached = [event for event in group if event.get("cache")]
+        summary[function] = {
+            "calls": len(group),
+            "errors": sum(event.get("status") == "error" for event in group),
+            "retries": sum(event.get("retries", 0) for event in group),
+            "truncated": sum(bool(event.get("truncated")) for event in group),
+            "cache_hit_ratio": (
+                sum(event["cache"] == "hit" for event in cached) / len(cached) if cached else None
+            ),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": round(sum(event_cost(event, input_price, output_price) for event in group), 6),
+            "latency_p50": percentile(totals, 0.50),
+            "latency_p95": percentile(totals, 0.95),
+            "latency_p99": percentile(totals, 0.99),
+            "ttft_p50": percentile(ttfts, 0.50),
+            "ttft_p95": percentile(ttfts, 0.95),
+            "limiter_wait_mean": (
+                round(sum(event.get("limiter_wait", 0) for event in group) / len(group), 4)
+            ),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize LLM call telemetry per function.")
+    parser.add_argument("--path", default=TELEMETRY_PATH)
+    parser.add_argument("--since", help="Only events on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--input-price", type=float, default=INPUT_PRICE, help="USD per million input tokens")
+    parser.add_argument("--output-price", type=float, default=OUTPUT_PRICE, help="USD per million output tokens")
+    parser.add_argument("--by", choices=("function", "route"), default="function", help="Group events by")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    since = datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since else None
+    summary = summarize(read_events(args.path, since), args.input_price, args.output_price, args.by)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    def seconds(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    print(f"{args.by:<30} {'calls':>6} {'err':>4} {'trunc':>5} {'in tok':>9} {'out tok':>9} {'cost $':>9} "
+          f"{'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'ttft50':>6} {'wait s':>6} {'cache':>6}")
+    for function, row in summary.items():
+        cache = "-" if row["cache_hit_ratio"] is None else f"{row['cache_hit_ratio']:.0%}"
+        print(f"{function:<30} {row['calls']:>6} {row['errors']:>4} {row['truncated']:>5} {row['input_tokens']:>9} "
+              f"{row['output_tokens']:>9} {row['cost_usd']:>9.4f} {seconds(row['latency_p50']):>6} "
+              f"{seconds(row['latency_p95']):>6} {seconds(row['latency_p99']):>6} "
+              f"{seconds(row['ttft_p50']):>6} {row['limiter_wait_mean']:>6.2f} {cache:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import hashlib
+import re
+
+
+def extract_keywords(text):
+    """extract keywords from text"""
+    keywords = re.findall(r'\b\w+\b', text.lower())
+    return keywords
+
+
+def document_hash(text):
+    """Stable key for a document's text, ignoring whitespace differences"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()